@@ -0,0 +1,262 @@
+import os
+import re
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, NamedTuple
+
+import numpy as np
+
+from .exceptions import InvalidInputError
+
+__all__ = [
+    "CacheInfo",
+    "ArrayCache",
+    "DiskArrayCache",
+]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    current_bytes: int
+    max_bytes: int
+
+
+class ArrayCache:
+    def __init__(self, max_bytes: int = 0):
+        _check_max_bytes(max_bytes)
+        self._max_bytes = max_bytes
+        self._data: OrderedDict[Hashable, np.ndarray] = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int):
+        _check_max_bytes(max_bytes)
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict(0)
+
+    def get(self, key: Hashable) -> np.ndarray | None:
+        with self._lock:
+            array = self._data.get(key)
+            if array is None:
+                self._misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+            return array
+
+    def put(self, key: Hashable, array: np.ndarray) -> None:
+        with self._lock:
+            if key in self._data:
+                self._current_bytes -= self._data.pop(key).nbytes
+            if array.nbytes > self._max_bytes:
+                return
+            self._evict(array.nbytes)
+            # Cached arrays are shared between callers, so they must not be mutated
+            array.setflags(write=False)
+            self._data[key] = array
+            self._current_bytes += array.nbytes
+
+    def pop(self, key: Hashable) -> np.ndarray | None:
+        with self._lock:
+            array = self._data.pop(key, None)
+            if array is not None:
+                self._current_bytes -= array.nbytes
+            return array
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._current_bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._data),
+                current_bytes=self._current_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def _evict(self, required_bytes: int) -> None:
+        while self._data and self._current_bytes + required_bytes > self._max_bytes:
+            _, array = self._data.popitem(last=False)
+            self._current_bytes -= array.nbytes
+            self._evictions += 1
+
+
+class DiskArrayCache:
+    # One uncompressed .npz file of named arrays per key. File modification
+    # times record use, so the LRU order survives between processes
+    def __init__(self, directory: str | Path, max_bytes: int = 1 << 30):
+        _check_max_bytes(max_bytes)
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._data: OrderedDict[str, int] = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.RLock()
+        stats = [(path, path.stat()) for path in self._directory.glob("*.npz")]
+        for path, stat in sorted(stats, key=lambda item: item[1].st_mtime_ns):
+            self._data[path.stem] = stat.st_size
+            self._current_bytes += stat.st_size
+        self._evict(0)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_bytes > 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, max_bytes: int):
+        _check_max_bytes(max_bytes)
+        with self._lock:
+            self._max_bytes = max_bytes
+            self._evict(0)
+
+    def get(self, key: str) -> dict[str, np.ndarray] | None:
+        with self._lock:
+            arrays = self._load(key) if key in self._data else None
+            if arrays is None:
+                self._misses += 1
+                return None
+            os.utime(self._path(key))
+            self._data.move_to_end(key)
+            self._hits += 1
+            return arrays
+
+    def put(self, key: str, arrays: dict[str, np.ndarray]) -> None:
+        path = self._path(key)
+        with self._lock:
+            self._remove(key)
+            if not self.enabled:
+                return
+            # Written under a temporary name, so readers never see partial files
+            with tempfile.NamedTemporaryFile(
+                dir=self._directory, prefix=".", suffix=".tmp", delete=False
+            ) as file:
+                np.savez(file, **arrays)
+            os.replace(file.name, path)
+            nbytes = path.stat().st_size
+            if nbytes > self._max_bytes:
+                path.unlink()
+                return
+            self._evict(nbytes)
+            self._data[key] = nbytes
+            self._current_bytes += nbytes
+
+    def pop(self, key: str) -> dict[str, np.ndarray] | None:
+        with self._lock:
+            arrays = self._load(key) if key in self._data else None
+            self._remove(key)
+            return arrays
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in self._data:
+                self._path(key).unlink(missing_ok=True)
+            self._data.clear()
+            self._current_bytes = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._data),
+                current_bytes=self._current_bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    def _path(self, key: str) -> Path:
+        if not _CACHE_KEY_PATTERN.fullmatch(key):
+            raise InvalidInputError(
+                {
+                    "key": key,
+                },
+                "Disk cache keys may only contain letters, digits, '_' and '-'.",
+            )
+        return self._directory / f"{key}.npz"
+
+    def _load(self, key: str) -> dict[str, np.ndarray] | None:
+        try:
+            with np.load(self._path(key), allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            # Removed or truncated by another process
+            self._remove(key)
+            return None
+
+    def _remove(self, key: str) -> None:
+        if key in self._data:
+            self._current_bytes -= self._data.pop(key)
+        self._path(key).unlink(missing_ok=True)
+
+    def _evict(self, required_bytes: int) -> None:
+        while self._data and self._current_bytes + required_bytes > self._max_bytes:
+            key, nbytes = self._data.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+            self._current_bytes -= nbytes
+            self._evictions += 1
+
+
+_CACHE_KEY_PATTERN = re.compile(r"[0-9A-Za-z_-]+")
+
+
+def _check_max_bytes(max_bytes: int):
+    if max_bytes < 0:
+        raise InvalidInputError(
+            {
+                "max_bytes": max_bytes,
+            },
+            "Cache byte budget must be a non-negative integer.",
+        )
@@ -1,6 +1,12 @@
+import contextlib
+import json
+import os
+import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Iterable
+from pathlib import Path
+from typing import Any, Iterable, Literal
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
@@ -153,10 +159,32 @@ class TabularDatasetData(BaseModel):
     def from_dict(cls, data: dict[str, Any]) -> "TabularDatasetData":
         pixels = pd.DataFrame(data["pixels"])
         signals = pd.DataFrame(data["signals"])
-        metadata = pd.DataFrame(data["metadata"])
+        metadata = _metadata_from_dict(
+            data["metadata"],
+            data.get("metadata_dtypes"),
+            data.get("metadata_categories"),
+        )
         target = TabularDatasetData.target_from_dict(data.get("target", None))
         return cls(pixels=pixels, signals=signals, metadata=metadata, target=target)
 
+    @classmethod
+    def load(cls, directory: str | Path, *, mmap: bool = True) -> "TabularDatasetData":
+        """Load a dataset written by save().
+
+        With mmap, numeric arrays are memory-mapped copy-on-write: they are read
+        from disk on access and can be edited like in-memory arrays, while the
+        files themselves are never modified.
+        """
+        directory = Path(directory)
+        manifest = json.loads((directory / _MANIFEST_FILENAME).read_text())
+        mmap_mode: Literal["c"] | None = "c" if mmap else None
+        return cls(
+            pixels=_load_frame(manifest["pixels"], directory, mmap_mode),
+            signals=_load_frame(manifest["signals"], directory, mmap_mode),
+            metadata=_load_frame(manifest["metadata"], directory, mmap_mode),
+            target=_load_target(manifest["target"], directory, mmap_mode),
+        )
+
     @staticmethod
     def target_from_dict(data: dict[str, Any] | None) -> Target | None:
         if data is None:
@@ -196,10 +224,51 @@ class TabularDatasetData(BaseModel):
         return {
             "pixels": self.pixels.to_dict(),
             "signals": self.signals.to_dict(),
-            "metadata": self.metadata.to_dict(),
+            "metadata": _metadata_to_dict(self.metadata),
+            "metadata_dtypes": {
+                name: str(dtype) for name, dtype in self.metadata.dtypes.items()
+            },
+            "metadata_categories": {
+                name: dtype.categories.to_list()
+                for name, dtype in self.metadata.dtypes.items()
+                if isinstance(dtype, pd.CategoricalDtype)
+            },
             "target": self.target.to_dict() if self.target is not None else None,
         }
 
+    def save(self, directory: str | Path) -> None:
+        # One .npy file per array and a JSON manifest for labels, categories and
+        # the target layout. Array names are unique to each save and the manifest
+        # is swapped in last, so an interrupted save leaves the previous dataset
+        # loadable; the files of the previous save are removed afterwards.
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = directory / _MANIFEST_FILENAME
+        tmp_manifest_path = manifest_path.with_name(f"{_MANIFEST_FILENAME}.tmp")
+        stale_files = _manifest_files(manifest_path)
+        prefix = uuid.uuid4().hex
+        try:
+            manifest: dict[str, Any] = {
+                "pixels": _save_frame(self.pixels, directory, f"{prefix}.pixels"),
+                "signals": _save_frame(self.signals, directory, f"{prefix}.signals"),
+                "metadata": _save_frame(self.metadata, directory, f"{prefix}.metadata"),
+                "target": _save_target(self.target, directory, f"{prefix}.target"),
+            }
+            manifest["files"] = sorted(
+                filepath.name for filepath in directory.glob(f"{prefix}.*.npy")
+            )
+            tmp_manifest_path.write_text(json.dumps(manifest))
+            os.replace(tmp_manifest_path, manifest_path)
+        except BaseException:
+            tmp_manifest_path.unlink(missing_ok=True)
+            for filepath in directory.glob(f"{prefix}.*.npy"):
+                filepath.unlink()
+            raise
+        for name in set(stale_files) - set(manifest["files"]):
+            # Files still memory-mapped elsewhere cannot be removed on every platform
+            with contextlib.suppress(OSError):
+                (directory / name).unlink()
+
     def to_dataframe(self) -> pd.DataFrame:
         combined_df = pd.concat([self.pixels, self.signals, self.metadata], axis=1)
         if self.target is not None:
@@ -214,3 +283,191 @@ class TabularDatasetData(BaseModel):
             metadata=self.metadata.reset_index(drop=True),
             target=self.target.reset_index() if self.target is not None else None,
         )
+
+
+def _metadata_to_dict(metadata: pd.DataFrame) -> dict[Any, Any]:
+    # Categorical columns are stored as their codes, categories are kept apart
+    return {
+        name: (
+            column.cat.codes.to_dict()
+            if isinstance(column.dtype, pd.CategoricalDtype)
+            else column.to_dict()
+        )
+        for name, column in metadata.items()
+    }
+
+
+def _metadata_from_dict(
+    data: dict[Any, Any],
+    dtypes: dict[Any, str] | None = None,
+    categories: dict[Any, list[Any]] | None = None,
+) -> pd.DataFrame:
+    metadata = pd.DataFrame(data)
+    categories = categories or {}
+    for name, dtype in (dtypes or {}).items():
+        if name in categories:
+            metadata[name] = pd.Categorical.from_codes(
+                metadata[name].to_numpy(), categories=pd.Index(categories[name])
+            )
+        else:
+            metadata[name] = metadata[name].astype(dtype)
+    return metadata
+
+
+_MANIFEST_FILENAME = "manifest.json"
+
+
+def _save_frame(frame: pd.DataFrame, directory: Path, stem: str) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "columns": frame.columns.tolist(),
+        "index": _save_index(frame.index, directory, f"{stem}.index"),
+    }
+    dtypes = frame.dtypes.unique()
+    if len(dtypes) == 1 and _is_plain_numeric(dtypes[0]):
+        # Homogeneous frames are kept as one contiguous 2D array
+        np.save(directory / f"{stem}.npy", frame.to_numpy())
+        entry["array"] = f"{stem}.npy"
+    else:
+        entry["series"] = [
+            _save_values(column, directory, f"{stem}.{idx}")
+            for idx, (_, column) in enumerate(frame.items())
+        ]
+    return entry
+
+
+def _load_frame(
+    entry: dict[str, Any], directory: Path, mmap_mode: Literal["c"] | None
+) -> pd.DataFrame:
+    index = _load_index(entry["index"], directory, mmap_mode)
+    columns = pd.Index(entry["columns"])
+    if "array" in entry:
+        array = _load_array(directory / entry["array"], mmap_mode)
+        return pd.DataFrame(array, index=index, columns=columns, copy=False)
+    frame = pd.DataFrame(
+        {
+            idx: _load_values(values, directory, mmap_mode)
+            for idx, values in enumerate(entry["series"])
+        },
+        index=index,
+    )
+    frame.columns = columns
+    return frame
+
+
+def _save_series(series: pd.Series, directory: Path, stem: str) -> dict[str, Any]:
+    return {
+        "name": series.name,
+        "index": _save_index(series.index, directory, f"{stem}.index"),
+        "values": _save_values(series, directory, stem),
+    }
+
+
+def _load_series(
+    entry: dict[str, Any], directory: Path, mmap_mode: Literal["c"] | None
+) -> pd.Series:
+    return pd.Series(
+        _load_values(entry["values"], directory, mmap_mode),
+        index=_load_index(entry["index"], directory, mmap_mode),
+        name=entry["name"],
+        copy=False,
+    )
+
+
+def _save_index(index: pd.Index, directory: Path, stem: str) -> dict[str, Any]:
+    if isinstance(index, pd.RangeIndex):
+        return {"start": index.start, "stop": index.stop, "step": index.step}
+    return {"values": _save_values(index.to_series(), directory, stem)}
+
+
+def _load_index(
+    entry: dict[str, Any], directory: Path, mmap_mode: Literal["c"] | None
+) -> pd.Index:
+    if "values" not in entry:
+        return pd.RangeIndex(entry["start"], entry["stop"], entry["step"])
+    return pd.Index(_load_values(entry["values"], directory, mmap_mode))
+
+
+def _save_values(series: pd.Series, directory: Path, stem: str) -> dict[str, Any]:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        np.save(directory / f"{stem}.npy", series.cat.codes.to_numpy())
+        return {
+            "kind": "categorical",
+            "file": f"{stem}.npy",
+            "categories": series.cat.categories.tolist(),
+            "ordered": bool(series.cat.ordered),
+        }
+    if _is_plain_numeric(series.dtype):
+        np.save(directory / f"{stem}.npy", series.to_numpy())
+        return {"kind": "array", "file": f"{stem}.npy"}
+    # Other columns, typically strings, are stored as codes into their values
+    codes, uniques = pd.factorize(series)
+    np.save(directory / f"{stem}.npy", codes)
+    return {"kind": "object", "file": f"{stem}.npy", "categories": uniques.tolist()}
+
+
+def _load_values(
+    entry: dict[str, Any], directory: Path, mmap_mode: Literal["c"] | None
+) -> np.ndarray | pd.Categorical:
+    array = _load_array(directory / entry["file"], mmap_mode)
+    if entry["kind"] == "categorical":
+        return pd.Categorical.from_codes(
+            array,  # type: ignore
+            categories=pd.Index(entry["categories"]),
+            ordered=entry["ordered"],
+        )
+    if entry["kind"] == "object":
+        categories = np.empty(len(entry["categories"]) + 1, dtype=object)
+        categories[:-1] = entry["categories"]
+        categories[-1] = np.nan
+        # Code -1 marks missing values and picks the trailing NaN
+        return categories[array]
+    return array
+
+
+def _save_target(
+    target: Target | None, directory: Path, stem: str
+) -> dict[str, Any] | None:
+    if isinstance(target, ClassificationTarget):
+        return {
+            "type": "classification",
+            "label": _save_series(target.label, directory, f"{stem}.label"),
+            "value": _save_series(target.value, directory, f"{stem}.value"),
+            "encoding": _save_series(target.encoding, directory, f"{stem}.encoding"),
+        }
+    if isinstance(target, RegressionTarget):
+        return {
+            "type": "regression",
+            "name": target.name,
+            "value": _save_series(target.value, directory, f"{stem}.value"),
+        }
+    return None
+
+
+def _load_target(
+    entry: dict[str, Any] | None, directory: Path, mmap_mode: Literal["c"] | None
+) -> Target | None:
+    if entry is None:
+        return None
+    value = _load_series(entry["value"], directory, mmap_mode)
+    if entry["type"] == "regression":
+        return RegressionTarget(value=value, name=entry["name"])
+    return ClassificationTarget(
+        label=_load_series(entry["label"], directory, mmap_mode),
+        value=value,
+        encoding=_load_series(entry["encoding"], directory, mmap_mode),
+    )
+
+
+def _manifest_files(manifest_path: Path) -> list[str]:
+    if not manifest_path.exists():
+        return []
+    return json.loads(manifest_path.read_text()).get("files", [])
+
+
+def _load_array(filepath: Path, mmap_mode: Literal["c"] | None) -> np.ndarray:
+    # Plain ndarray views of the memmap, which pandas treats like any other array
+    return np.load(filepath, mmap_mode=mmap_mode).view(np.ndarray)
+
+
+def _is_plain_numeric(dtype: Any) -> bool:
+    return isinstance(dtype, np.dtype) and dtype.kind in "biuf"
@@ -1,14 +1,21 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterator
+from tempfile import TemporaryDirectory
+from typing import Any, Iterator, NamedTuple, Sequence
 
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, ConfigDict
 
+from siapy.core.cache import DiskArrayCache
 from siapy.core.exceptions import InvalidInputError
 from siapy.core.types import ImageContainerType
 from siapy.datasets.schemas import TabularDatasetData
-from siapy.entities import Signatures, SpectralImage, SpectralImageSet
+from siapy.entities import Pixels, Shape, Signatures, SpectralImage, SpectralImageSet
+from siapy.utils.general import get_number_cpus
 
 __all__ = [
     "TabularDataset",
@@ -31,13 +38,18 @@ class TabularDataEntity(MetaDataEntity):
 
 @dataclass
 class TabularDataset:
-    def __init__(self, container: ImageContainerType):
+    def __init__(
+        self, container: ImageContainerType, *, cache: DiskArrayCache | None = None
+    ):
         self._image_set = (
             SpectralImageSet([container])
             if isinstance(container, SpectralImage)
             else container
         )
+        self._cache = cache
         self._data_entities: list[TabularDataEntity] = []
+        self._entity_keys: list[_EntityKey] = []
+        self._extracted: dict[_EntityKey, _ExtractedEntity] = {}
 
     def __len__(self) -> int:
         return len(self.data_entities)
@@ -61,60 +73,202 @@ class TabularDataset:
     def data_entities(self) -> list[TabularDataEntity]:
         return self._data_entities
 
-    def process_image_data(self):
+    @property
+    def cache(self) -> DiskArrayCache | None:
+        return self._cache
+
+    def process_image_data(self, n_jobs: int = 1):
+        # n_jobs > 1 extracts images in worker processes; -1 uses all CPUs.
+        # Only (image, shape) pairs with an unknown fingerprint are extracted,
+        # unchanged pairs keep the signatures of the previous run
+        n_jobs = get_number_cpus(n_jobs)
+        images = list(self.image_set)
+        keys = [_entity_keys(image) for image in images]
+        extracted = {
+            key: self._extracted[key]
+            for image_keys in keys
+            for key in image_keys
+            if key in self._extracted
+        }
+        pending: dict[int, list[int]] = {}
+        for image_idx, image_keys in enumerate(keys):
+            shape_ids = []
+            for shape_idx, key in enumerate(image_keys):
+                if key in extracted:
+                    continue
+                signatures = self._load_cached_signatures(key)
+                if signatures is None:
+                    shape_ids.append(shape_idx)
+                else:
+                    extracted[key] = _ExtractedEntity(signatures, {})
+            if shape_ids:
+                pending[image_idx] = shape_ids
+        for image_idx, signatures_list in _extract_signatures(images, pending, n_jobs):
+            for shape_idx, signatures in zip(pending[image_idx], signatures_list):
+                key = keys[image_idx][shape_idx]
+                extracted[key] = _ExtractedEntity(signatures, {})
+                self._store_cached_signatures(key, signatures)
+        # Pairs no longer in the image set are dropped from the in-memory cache
+        self._extracted = extracted
+
         self.data_entities.clear()
-        for image_idx, image in enumerate(self.image_set):
-            for shape_idx, shape in enumerate(image.geometric_shapes.shapes):
-                signatures = image.to_signatures(shape.convex_hull())
-                entity = TabularDataEntity(
-                    image_idx=image_idx,
-                    shape_idx=shape_idx,
-                    image_filepath=image.filepath,
-                    camera_id=image.camera_id,
-                    shape_type=shape.shape_type,
-                    shape_label=shape.label,
-                    signatures=signatures,
-                )
-                self.data_entities.append(entity)
+        self._entity_keys.clear()
+        for image_idx, image in enumerate(images):
+            self._append_data_entities(
+                image_idx,
+                image,
+                [extracted[key].signatures for key in keys[image_idx]],
+            )
+            self._entity_keys.extend(keys[image_idx])
+
+    def _append_data_entities(
+        self,
+        image_idx: int,
+        image: SpectralImage,
+        signatures_list: list[Signatures],
+    ):
+        for shape_idx, (shape, signatures) in enumerate(
+            zip(image.geometric_shapes.shapes, signatures_list)
+        ):
+            entity = TabularDataEntity(
+                image_idx=image_idx,
+                shape_idx=shape_idx,
+                image_filepath=image.filepath,
+                camera_id=image.camera_id,
+                shape_type=shape.shape_type,
+                shape_label=shape.label,
+                signatures=signatures,
+            )
+            self.data_entities.append(entity)
 
     def generate_dataset_data(self, mean_signatures=True) -> TabularDatasetData:
         self._check_data_entities()
-        pixels_dfs = []
-        signals_dfs = []
-        metadata_dfs = []
-        for entity in self.data_entities:
-            signatures_df = entity.signatures.to_dataframe().dropna()
-            if mean_signatures:
-                signatures_df = signatures_df.mean().to_frame().T
+        # Columnar assembly: per-entity blocks are copied into preallocated arrays,
+        # rows with NaNs are dropped once at the end
+        blocks = [
+            self._entity_block(entity_idx, mean_signatures)
+            for entity_idx in range(len(self.data_entities))
+        ]
+        columns: dict[Any, int] = {}
+        for block in blocks:
+            for column in block.columns:
+                columns.setdefault(column, len(columns))
+        uniform_columns = all(block.columns == list(columns) for block in blocks)
+        signals_dtype = np.result_type(*(block.signals.dtype for block in blocks))
+        if not uniform_columns:
+            # Bands missing from an image are filled with NaN, as in pd.concat
+            signals_dtype = np.result_type(signals_dtype, np.float32)
 
-            signatures_len = len(signatures_df)
-            metadata_df = pd.DataFrame(
-                {
-                    "image_idx": [str(entity.image_idx)] * signatures_len,
-                    "image_filepath": [str(entity.image_filepath)] * signatures_len,
-                    "camera_id": [entity.camera_id] * signatures_len,
-                    "shape_idx": [str(entity.shape_idx)] * signatures_len,
-                    "shape_type": [entity.shape_type] * signatures_len,
-                    "shape_label": [entity.shape_label] * signatures_len,
-                }
-            )
+        counts = np.array([len(block.pixels) for block in blocks], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        pixels_arr = np.empty(
+            (offsets[-1], 2), dtype=np.result_type(*(b.pixels.dtype for b in blocks))
+        )
+        signals_arr = (
+            np.empty((offsets[-1], len(columns)), dtype=signals_dtype)
+            if uniform_columns
+            else np.full((offsets[-1], len(columns)), np.nan, dtype=signals_dtype)
+        )
+        valid = np.empty(offsets[-1], dtype=bool)
+        for block, start, stop in zip(blocks, offsets[:-1], offsets[1:]):
+            pixels_arr[start:stop] = block.pixels
+            if uniform_columns:
+                signals_arr[start:stop] = block.signals
+            else:
+                positions = [columns[column] for column in block.columns]
+                signals_arr[start:stop, positions] = block.signals
+            valid[start:stop] = block.valid
+        valid_counts = np.array([np.count_nonzero(block.valid) for block in blocks])
 
-            assert (
-                list(metadata_df.columns) == list(MetaDataEntity.model_fields.keys())
-            ), "Sanity check failed! The columns in metadata_df do not match MetaDataEntity fields."
+        metadata_df = pd.DataFrame(
+            {
+                name: _repeat_metadata(
+                    name, [getattr(entity, name) for entity in self], valid_counts
+                )
+                for name in MetaDataEntity.model_fields
+            }
+        )
+        return TabularDatasetData(
+            pixels=pd.DataFrame(
+                pixels_arr[valid], columns=[Pixels.coords.U, Pixels.coords.V]
+            ),
+            signals=pd.DataFrame(signals_arr[valid], columns=list(columns)),
+            metadata=metadata_df,
+        )
 
-            signatures = Signatures.from_dataframe(signatures_df)
+    def save_signatures_to_parquet(
+        self,
+        root: str | Path,
+        *,
+        partition_by: Sequence[str] = ("camera_id", "shape_label"),
+        row_group_size: int | None = None,
+        append: bool = False,
+    ) -> None:
+        # One hive partition per metadata value, so a camera or class can be read
+        # back with Signatures.load_from_parquet(root, filters=...) alone
+        self._check_data_entities()
+        unknown_keys = set(partition_by) - set(MetaDataEntity.model_fields)
+        if not partition_by or unknown_keys:
+            raise InvalidInputError(
+                {
+                    "partition_by": list(partition_by),
+                    "available_keys": list(MetaDataEntity.model_fields),
+                },
+                "Signatures can only be partitioned by data entity metadata.",
+            )
+        # Unless appending, each partition is replaced on its first write and the
+        # remaining entities of the same partition are added to it
+        written: set[tuple[Any, ...]] = set()
+        for entity in self.data_entities:
+            partition = {
+                key: _partition_value(getattr(entity, key)) for key in partition_by
+            }
+            partition_key = tuple(partition.values())
+            entity.signatures.save_to_parquet(
+                root,
+                row_group_size=row_group_size,
+                partition=partition,
+                append=append or partition_key in written,
+            )
+            written.add(partition_key)
 
-            pixels_dfs.append(signatures.pixels.df)
-            signals_dfs.append(signatures.signals.df)
-            metadata_dfs.append(metadata_df)
+    def _load_cached_signatures(self, key: "_EntityKey") -> Signatures | None:
+        if self._cache is None:
+            return None
+        arrays = self._cache.get(_disk_cache_key(key))
+        if arrays is None:
+            return None
+        return Signatures.from_signals_and_pixels(
+            arrays["signals"], Pixels.from_arrays(arrays["u"], arrays["v"])
+        )
 
-        return TabularDatasetData(
-            pixels=pd.concat(pixels_dfs, ignore_index=True),
-            signals=pd.concat(signals_dfs, ignore_index=True),
-            metadata=pd.concat(metadata_dfs, ignore_index=True),
+    def _store_cached_signatures(
+        self, key: "_EntityKey", signatures: Signatures
+    ) -> None:
+        if self._cache is None:
+            return
+        self._cache.put(
+            _disk_cache_key(key),
+            {
+                "u": signatures.pixels.u_array(),
+                "v": signatures.pixels.v_array(),
+                "signals": signatures.signals.to_numpy(),
+            },
         )
 
+    def _entity_block(self, entity_idx: int, mean: bool) -> "_SignaturesBlock":
+        # Blocks of extracted entities are computed once per mean mode; entities
+        # replaced or added by hand are always recomputed
+        signatures = self.data_entities[entity_idx].signatures
+        cached = None
+        if entity_idx < len(self._entity_keys):
+            cached = self._extracted.get(self._entity_keys[entity_idx])
+        if cached is None or cached.signatures is not signatures:
+            return _signatures_block(signatures, mean)
+        if mean not in cached.blocks:
+            cached.blocks[mean] = _signatures_block(signatures, mean)
+        return cached.blocks[mean]
+
     def _check_data_entities(self):
         if not self.data_entities:
             raise InvalidInputError(
@@ -124,3 +278,197 @@ class TabularDataset:
                 },
                 "No data_entities! You need to process the image set first.",
             )
+
+
+class _SignaturesBlock(NamedTuple):
+    pixels: np.ndarray
+    signals: np.ndarray
+    columns: list[Any]
+    valid: np.ndarray
+
+
+def _signatures_block(signatures: Signatures, mean: bool) -> _SignaturesBlock:
+    pixels = signatures.pixels.to_numpy()
+    signals = signatures.signals.to_numpy()
+    columns = signatures.signals.columns.tolist()
+    valid = ~(_isnan_rows(pixels) | _isnan_rows(signals))
+    if not mean:
+        return _SignaturesBlock(pixels, signals, columns, valid)
+    # Mean over complete rows only; an entity without any yields one NaN row
+    if valid.any():
+        pixels_mean = pixels[valid].mean(axis=0, dtype=np.float64, keepdims=True)
+        signals_mean = signals[valid].mean(axis=0, keepdims=True)
+    else:
+        pixels_mean = np.full((1, pixels.shape[1]), np.nan)
+        signals_mean = np.full(
+            (1, signals.shape[1]), np.nan, dtype=np.result_type(signals, np.float32)
+        )
+    return _SignaturesBlock(pixels_mean, signals_mean, columns, np.ones(1, dtype=bool))
+
+
+def _isnan_rows(array: np.ndarray) -> np.ndarray:
+    if not np.issubdtype(array.dtype, np.inexact):
+        return np.zeros(len(array), dtype=bool)
+    return np.isnan(array).any(axis=1)
+
+
+_INDEX_METADATA_FIELDS = ("image_idx", "shape_idx")
+
+
+def _repeat_metadata(name: str, values: list[Any], counts: np.ndarray) -> Any:
+    # One value per entity, repeated per row: indices as int32, the rest as
+    # categorical codes instead of one string per row
+    if name in _INDEX_METADATA_FIELDS:
+        return np.repeat(np.asarray(values, dtype=np.int32), counts)
+    values = [str(value) if isinstance(value, Path) else value for value in values]
+    codes, categories = pd.factorize(pd.Series(values, dtype=object))
+    return pd.Categorical.from_codes(
+        np.repeat(codes, counts),  # type: ignore
+        categories=categories,
+    )
+
+
+class _EntityKey(NamedTuple):
+    image: tuple[Any, ...]
+    shape: str
+
+
+class _ExtractedEntity(NamedTuple):
+    signatures: Signatures
+    blocks: dict[bool, "_SignaturesBlock"]
+
+
+def _entity_keys(image: SpectralImage) -> list[_EntityKey]:
+    image_fingerprint = _image_fingerprint(image)
+    return [
+        _EntityKey(image_fingerprint, _shape_fingerprint(shape))
+        for shape in image.geometric_shapes.shapes
+    ]
+
+
+def _image_fingerprint(image: SpectralImage) -> tuple[Any, ...]:
+    # Rewriting the image or its header changes the size or modification time
+    paths = [image.filepath]
+    if image.header_path is not None:
+        paths.append(image.header_path)
+    fingerprint = []
+    for path in paths:
+        stat = os.stat(path)
+        fingerprint.append((str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def _shape_fingerprint(shape: Shape) -> str:
+    # Content hash of the shape pixels; the label only affects metadata
+    digest = hashlib.blake2b(shape.shape_type.encode(), digest_size=16)
+    for array in (shape.pixels.u_array(), shape.pixels.v_array()):
+        digest.update(array.dtype.str.encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _disk_cache_key(key: _EntityKey) -> str:
+    return hashlib.blake2b(
+        repr(key.image).encode() + key.shape.encode(), digest_size=16
+    ).hexdigest()
+
+
+def _extract_signatures(
+    images: list[SpectralImage], pending: dict[int, list[int]], n_jobs: int
+) -> Iterator[tuple[int, list[Signatures]]]:
+    if n_jobs == 1 or not pending:
+        for image_idx, shape_ids in pending.items():
+            image = images[image_idx]
+            shapes = image.geometric_shapes.shapes
+            # One pass over the image for all shapes, split per shape afterwards
+            yield (
+                image_idx,
+                image.to_signatures_many(
+                    [shapes[shape_idx].convex_hull() for shape_idx in shape_ids]
+                ),
+            )
+        return
+
+    tasks = {
+        image_idx: _extraction_task(images[image_idx], shape_ids)
+        for image_idx, shape_ids in pending.items()
+    }
+    with (
+        TemporaryDirectory() as tmpdir,
+        ProcessPoolExecutor(max_workers=n_jobs) as executor,
+    ):
+        futures = {
+            image_idx: executor.submit(
+                _extract_image_signatures, task, Path(tmpdir, f"{image_idx}.npz")
+            )
+            for image_idx, task in tasks.items()
+        }
+        # Results are assembled in image order, whatever order workers finish in
+        for image_idx, future in futures.items():
+            yield image_idx, _load_image_signatures(future.result())
+
+
+class _ExtractionTask(NamedTuple):
+    header_path: Path
+    image_path: Path
+    memmap: bool
+    shapes: list[Shape]
+
+
+def _extraction_task(image: SpectralImage, shape_ids: list[int]) -> _ExtractionTask:
+    # Open files cannot be pickled, so workers reopen the image from its paths
+    if image.header_path is None:
+        raise InvalidInputError(
+            {
+                "image": str(image.filepath),
+            },
+            "Parallel processing requires images opened with SpectralImage.envi_open.",
+        )
+    return _ExtractionTask(
+        header_path=image.header_path,
+        image_path=image.filepath,
+        memmap=image.memmap,
+        shapes=[image.geometric_shapes.shapes[shape_idx] for shape_idx in shape_ids],
+    )
+
+
+def _extract_image_signatures(task: _ExtractionTask, output_path: Path) -> Path:
+    # Arrays are handed back through an uncompressed .npz file, not pickled frames
+    image = SpectralImage.envi_open(
+        header_path=task.header_path, image_path=task.image_path, memmap=task.memmap
+    )
+    signatures_list = image.to_signatures_many(
+        [shape.convex_hull() for shape in task.shapes]
+    )
+    arrays = {
+        "lengths": np.array([len(s.pixels) for s in signatures_list], dtype=np.int64)
+    }
+    if signatures_list:
+        arrays["u"] = np.concatenate([s.pixels.u_array() for s in signatures_list])
+        arrays["v"] = np.concatenate([s.pixels.v_array() for s in signatures_list])
+        arrays["signals"] = np.concatenate(
+            [s.signals.to_numpy() for s in signatures_list]
+        )
+    np.savez(output_path, **arrays)
+    return output_path
+
+
+def _load_image_signatures(path: Path) -> list[Signatures]:
+    with np.load(path) as data:
+        lengths = data["lengths"]
+        if not len(lengths):
+            return []
+        u, v, signals = data["u"], data["v"], data["signals"]
+    offsets = np.cumsum(lengths)[:-1]
+    return [
+        Signatures.from_signals_and_pixels(
+            signals_part, Pixels.from_arrays(u_part, v_part)
+        )
+        for u_part, v_part, signals_part in zip(
+            np.split(u, offsets), np.split(v, offsets), np.split(signals, offsets)
+        )
+    ]
+
+
+def _partition_value(value: object) -> object:
+    return str(value) if isinstance(value, Path) else value
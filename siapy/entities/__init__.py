@@ -1,5 +1,5 @@
 from .images import SpectralImage
-from .imagesets import SpectralImageSet
+from .imagesets import LazySpectralImageSet, SpectralImageSet
 from .pixels import Pixels
 from .shapes import Shape
 from .signatures import Signatures
@@ -7,6 +7,7 @@ from .signatures import Signatures
 __all__ = [
     "SpectralImage",
     "SpectralImageSet",
+    "LazySpectralImageSet",
     "Pixels",
     "Signatures",
     "Shape",
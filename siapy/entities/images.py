@@ -1,17 +1,32 @@
 # mypy: ignore-errors
+import os
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Iterable, Iterator, Sequence
+from typing import (
+    TYPE_CHECKING,
+    Annotated,
+    Any,
+    Callable,
+    ClassVar,
+    Iterable,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Sequence,
+)
 
 import numpy as np
 import spectral as sp
 from PIL import Image, ImageOps
 
+from siapy.core.cache import ArrayCache
 from siapy.core.exceptions import InvalidFilepathError, InvalidInputError
 
+from .pixels import PixelsBox, SpanPixels
 from .shapes import Shape
 from .signatures import Signatures
+from .stats import ImageStats, StreamingStats
 
 if TYPE_CHECKING:
     from ..core.types import SpectralType
@@ -21,8 +36,23 @@ if TYPE_CHECKING:
 __all__ = [
     "GeometricShapes",
     "SpectralImage",
+    "WavelengthRange",
+    "BandsType",
+    "BandLabelsType",
 ]
 
+# Upper bound for the size of a single region read from disk
+_READ_BLOCK_BYTES = 64 * 1024**2
+
+
+class WavelengthRange(NamedTuple):
+    start: Annotated[float, "lowest wavelength to include"]
+    stop: Annotated[float, "highest wavelength to include"]
+
+
+BandsType = Sequence[int] | WavelengthRange
+BandLabelsType = Literal["indices", "wavelengths"]
+
 
 @dataclass
 class GeometricShapes:
@@ -132,11 +162,30 @@ class GeometricShapes:
 
 @dataclass
 class SpectralImage:
+    # Decoded cubes shared by all instances; disabled until max_bytes is set
+    cube_cache: ClassVar[ArrayCache] = ArrayCache(max_bytes=0)
+
     def __init__(
-        self, sp_file: "SpectralType", geometric_shapes: list["Shape"] | None = None
+        self,
+        sp_file: "SpectralType",
+        geometric_shapes: list["Shape"] | None = None,
+        *,
+        memmap: bool = False,
     ):
+        if memmap and sp_file.scale_factor != 1:
+            raise InvalidInputError(
+                {
+                    "scale_factor": sp_file.scale_factor,
+                },
+                "Memory-mapped access is not supported for scaled image data.",
+            )
         self._sp_file = sp_file
         self._geometric_shapes = GeometricShapes(self, geometric_shapes)
+        self._memmap = memmap
+        self._memmap_view: np.ndarray | None = None
+        self._header_path: Path | None = None
+        self._parsed_metadata: dict[str, Any] = {}
+        self._parsed_metadata_source: dict[str, Any] | None = None
 
     def __repr__(self) -> str:
         return repr(self._sp_file)
@@ -157,7 +206,11 @@ class SpectralImage:
 
     @classmethod
     def envi_open(
-        cls, *, header_path: str | Path, image_path: str | Path | None = None
+        cls,
+        *,
+        header_path: str | Path,
+        image_path: str | Path | None = None,
+        memmap: bool = False,
     ) -> "SpectralImage":
         if not Path(header_path).exists():
             raise InvalidFilepathError(str(header_path))
@@ -169,7 +222,9 @@ class SpectralImage:
                 },
                 "Opened file of type SpectralLibrary",
             )
-        return cls(sp_file)
+        image = cls(sp_file, memmap=memmap)
+        image._header_path = Path(header_path)
+        return image
 
     @property
     def file(self) -> "SpectralType":
@@ -179,10 +234,20 @@ class SpectralImage:
     def filepath(self) -> Path:
         return Path(self._sp_file.filename)
 
+    @property
+    def header_path(self) -> Path | None:
+        # Known only for images opened with envi_open
+        return self._header_path
+
     @property
     def metadata(self) -> dict[str, Any]:
         return self._sp_file.metadata
 
+    @metadata.setter
+    def metadata(self, metadata: dict[str, Any]):
+        self._sp_file.metadata = metadata
+        self._parsed_metadata.clear()
+
     @property
     def shape(self) -> tuple[int, int, int]:
         rows = self._sp_file.nrows
@@ -204,30 +269,46 @@ class SpectralImage:
 
     @property
     def default_bands(self) -> list[int]:
-        db = self.metadata.get("default bands", [])
-        return list(map(int, db))
+        return list(self._parsed("default_bands", _parse_default_bands))
 
     @property
-    def wavelengths(self) -> list[float]:
-        wavelength_data = self.metadata.get("wavelength", [])
-        return list(map(float, wavelength_data))
+    def wavelengths(self) -> np.ndarray:
+        return self._parsed("wavelengths", _parse_wavelengths)
 
     @property
     def description(self) -> dict[str, Any]:
-        description_str = self.metadata.get("description", {})
-        return _parse_description(description_str)
+        return dict(self._parsed("description", _parse_metadata_description))
 
     @property
     def camera_id(self) -> str:
-        return self.description.get("ID", "")
+        return self._parsed(
+            "camera_id",
+            lambda metadata: _parse_metadata_description(metadata).get("ID", ""),
+        )
 
     @property
     def geometric_shapes(self) -> GeometricShapes:
         return self._geometric_shapes
 
+    @property
+    def memmap(self) -> bool:
+        return self._memmap
+
+    def open_memmap(self) -> np.ndarray:
+        # Read-only (rows, cols, bands) view; non-BIP files are transposed as a view
+        if self._memmap_view is None:
+            self._memmap_view = self._sp_file.open_memmap(
+                interleave="bip", writable=False
+            )
+        return self._memmap_view
+
     def to_display(self, equalize: bool = True) -> Image.Image:
         max_uint8 = 255.0
-        image_3ch = self._sp_file.read_bands(self.default_bands)
+        cube = self._cached_cube()
+        if cube is not None:
+            image_3ch = cube[:, :, self.default_bands]
+        else:
+            image_3ch = self._sp_file.read_bands(self.default_bands)
         image_3ch = self._remove_nan(image_3ch, nan_value=0)
         image_3ch[:, :, 0] = image_3ch[:, :, 0] / image_3ch[:, :, 0].max() / max_uint8
         image_3ch[:, :, 1] = image_3ch[:, :, 1] / (image_3ch[:, :, 1].max() / max_uint8)
@@ -237,39 +318,369 @@ class SpectralImage:
             image = ImageOps.equalize(image)
         return image
 
-    def to_numpy(self, nan_value: float | None = None) -> np.ndarray:
-        image = self._sp_file[:, :, :]
+    def to_numpy(
+        self, nan_value: float | None = None, *, bands: BandsType | None = None
+    ) -> np.ndarray:
+        band_indices = self.resolve_bands(bands)
+        image = self._shared_cube()
+        if image is not None:
+            if band_indices is not None:
+                image = image[:, :, band_indices]
+            elif nan_value is not None:
+                image = np.array(image)
+        elif band_indices is not None:
+            image = self._sp_file.read_bands(band_indices)
+        else:
+            image = self._sp_file[:, :, :]
+
         if nan_value is not None:
             image = self._remove_nan(image, nan_value)
         return image
 
-    def to_signatures(self, pixels: "Pixels") -> Signatures:
-        image_arr = self.to_numpy()
-        signatures = Signatures.from_array_and_pixels(image_arr, pixels)
-        return signatures
-
-    def to_subarray(self, pixels: "Pixels") -> np.ndarray:
-        image_arr = self.to_numpy()
-        u_max = pixels.u().max()
-        u_min = pixels.u().min()
-        v_max = pixels.v().max()
-        v_min = pixels.v().min()
-        # create new image
-        image_arr_area = np.nan * np.ones(
-            (v_max - v_min + 1, u_max - u_min + 1, self.bands)
+    def to_signatures(
+        self,
+        pixels: "Pixels | PixelsBox",
+        *,
+        bands: BandsType | None = None,
+        dtype: np.dtype | type | str | None = None,
+        band_labels: BandLabelsType = "indices",
+    ) -> Signatures:
+        band_indices = self.resolve_bands(bands)
+        columns = self._band_labels(band_indices, band_labels)
+        if isinstance(pixels, PixelsBox):
+            # Box interiors are read as one window, ordered like PixelsBox.to_pixels
+            window = self._read_window(pixels, band_indices)
+            signals_arr = window.transpose(1, 0, 2).reshape(-1, window.shape[2])
+            pixels = pixels.to_pixels()
+        elif isinstance(pixels, SpanPixels):
+            signals_arr = self._read_spans(pixels.spans, band_indices)
+        else:
+            v = pixels.v_array()
+            u = pixels.u_array()
+            image = self._shared_cube()
+            if image is not None:
+                signals_arr = image[v, u, :]
+                if band_indices is not None:
+                    signals_arr = signals_arr[:, band_indices]
+            else:
+                signals_arr = self._gather_pixels(v, u, band_indices)
+        return Signatures.from_signals_and_pixels(
+            signals_arr, pixels, columns=columns, dtype=dtype
         )
+
+    def to_signatures_many(
+        self,
+        pixels_list: Sequence["Pixels | PixelsBox"],
+        *,
+        bands: BandsType | None = None,
+        dtype: np.dtype | type | str | None = None,
+        band_labels: BandLabelsType = "indices",
+    ) -> list[Signatures]:
+        # All pixel sets are gathered in one pass over the image, so row runs
+        # shared by several shapes are read only once, then split per set
+        band_indices = self.resolve_bands(bands)
+        columns = self._band_labels(band_indices, band_labels)
+        pixels_list = [
+            pixels.to_pixels() if isinstance(pixels, PixelsBox) else pixels
+            for pixels in pixels_list
+        ]
+        if not pixels_list:
+            return []
+        v = np.concatenate([pixels.v_array() for pixels in pixels_list])
+        u = np.concatenate([pixels.u_array() for pixels in pixels_list])
+        image = self._shared_cube()
+        if image is not None:
+            signals_arr = image[v, u, :]
+            if band_indices is not None:
+                signals_arr = signals_arr[:, band_indices]
+        else:
+            signals_arr = self._gather_pixels(v, u, band_indices)
+        offsets = np.cumsum([len(pixels) for pixels in pixels_list])[:-1]
+        return [
+            Signatures.from_signals_and_pixels(
+                signals_part, pixels, columns=columns, dtype=dtype
+            )
+            for signals_part, pixels in zip(np.split(signals_arr, offsets), pixels_list)
+        ]
+
+    def to_subarray(
+        self,
+        pixels: "Pixels | PixelsBox",
+        *,
+        bands: BandsType | None = None,
+        out: np.ndarray | None = None,
+    ) -> np.ndarray:
+        band_indices = self.resolve_bands(bands)
+        bands_count = self.bands if band_indices is None else len(band_indices)
+        box = pixels if isinstance(pixels, PixelsBox) else pixels.box()
+        area_shape = (box.height, box.width, bands_count)
+
+        if out is None:
+            out = np.full(area_shape, np.nan)
+        else:
+            if out.shape != area_shape or not np.issubdtype(out.dtype, np.floating):
+                raise InvalidInputError(
+                    {
+                        "out_shape": out.shape,
+                        "out_dtype": str(out.dtype),
+                        "required_shape": area_shape,
+                    },
+                    "Output buffer must be a floating point array of the pixels bounding box shape.",
+                )
+            out.fill(np.nan)
+
+        # Read only the bounding box of the pixels
+        window = self._read_window(box, band_indices)
+        if isinstance(pixels, PixelsBox):
+            out[...] = window
+            return out
+        if isinstance(pixels, SpanPixels):
+            for v, u_start, u_end in pixels.spans - (box.v_min, box.u_min, box.u_min):
+                out[v, u_start : u_end + 1] = window[v, u_start : u_end + 1]
+            return out
         # convert original coordinates to coordinates for new image
-        v_norm = pixels.v() - v_min
-        u_norm = pixels.u() - u_min
-        # write values from original image to new image
-        image_arr_area[v_norm, u_norm, :] = image_arr[pixels.v(), pixels.u(), :]
-        return image_arr_area
+        v_norm = pixels.v_array() - box.v_min
+        u_norm = pixels.u_array() - box.u_min
+        out[v_norm, u_norm] = window[v_norm, u_norm]
+        return out
 
     def mean(
         self, axis: int | tuple[int, ...] | Sequence[int] | None = None
     ) -> float | np.ndarray:
-        image_arr = self.to_numpy()
-        return np.nanmean(image_arr, axis=axis)
+        axes = _normalize_axes(axis, ndim=3)
+        dtype = np.dtype(self._sp_file.dtype)
+        out_dtype = dtype if np.issubdtype(dtype, np.floating) else np.float64
+
+        if 0 not in axes:
+            # Row blocks are independent, so block results are simply stacked
+            with np.errstate(invalid="ignore", divide="ignore"):
+                block_means = [
+                    np.nansum(block, axis=axes, dtype=np.float64)
+                    / np.count_nonzero(~np.isnan(block), axis=axes)
+                    for block in self._iter_row_blocks()
+                ]
+            return np.concatenate(block_means, axis=0).astype(out_dtype)
+
+        total_sum: Any = 0.0
+        total_count: Any = 0
+        for block in self._iter_row_blocks():
+            total_sum = total_sum + np.nansum(block, axis=axes, dtype=np.float64)
+            total_count = total_count + np.count_nonzero(~np.isnan(block), axis=axes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.asarray(total_sum / total_count).astype(out_dtype)
+        return mean[()] if mean.ndim == 0 else mean
+
+    def stats(
+        self,
+        *,
+        percentiles: Sequence[float] = (),
+        sample_size: int = 100_000,
+        bins: int | None = None,
+        bins_range: tuple[float, float] | None = None,
+        block_rows: int | None = None,
+    ) -> ImageStats:
+        streaming_stats = StreamingStats(
+            self.bands,
+            percentiles=percentiles,
+            sample_size=sample_size,
+            bins=bins,
+            bins_range=bins_range,
+        )
+        for block in self._iter_row_blocks(block_rows):
+            streaming_stats.update(block)
+        return streaming_stats.result()
+
+    def _iter_row_blocks(self, block_rows: int | None = None) -> Iterator[np.ndarray]:
+        if block_rows is None:
+            row_bytes = self.cols * self.bands * np.dtype(self._sp_file.dtype).itemsize
+            block_rows = max(1, _READ_BLOCK_BYTES // max(row_bytes, 1))
+        if block_rows < 1:
+            raise InvalidInputError(
+                {
+                    "block_rows": block_rows,
+                },
+                "Number of rows per block must be positive.",
+            )
+
+        image = self._shared_cube()
+        if image is not None:
+            for row_start in range(0, self.rows, block_rows):
+                yield image[row_start : row_start + block_rows]
+        else:
+            for row_start in range(0, self.rows, block_rows):
+                row_stop = min(row_start + block_rows, self.rows)
+                yield self._sp_file.read_subregion(
+                    (row_start, row_stop), (0, self.cols)
+                )
+
+    def resolve_bands(self, bands: BandsType | None) -> list[int] | None:
+        if bands is None:
+            return None
+        if isinstance(bands, WavelengthRange):
+            wavelengths = self.wavelengths
+            if not len(wavelengths):
+                raise InvalidInputError(
+                    {
+                        "bands": bands,
+                    },
+                    "Image metadata does not define wavelengths.",
+                )
+            band_indices = np.nonzero(
+                (wavelengths >= bands.start) & (wavelengths <= bands.stop)
+            )[0].tolist()
+        else:
+            band_indices = [int(band) for band in bands]
+
+        if not band_indices:
+            raise InvalidInputError(
+                {
+                    "bands": bands,
+                },
+                "Band selection is empty.",
+            )
+        if not all(0 <= band < self.bands for band in band_indices):
+            raise InvalidInputError(
+                {
+                    "bands": bands,
+                    "image_bands": self.bands,
+                },
+                "Band index out of range.",
+            )
+        return band_indices
+
+    def _band_labels(
+        self, band_indices: list[int] | None, band_labels: BandLabelsType
+    ) -> list[Any] | None:
+        if band_labels == "indices":
+            return band_indices
+        if band_labels != "wavelengths":
+            raise InvalidInputError(
+                {
+                    "band_labels": band_labels,
+                },
+                "Band labels must be either 'indices' or 'wavelengths'.",
+            )
+        wavelengths = self.wavelengths
+        if len(wavelengths) != self.bands:
+            raise InvalidInputError(
+                {
+                    "wavelengths": len(wavelengths),
+                    "bands": self.bands,
+                },
+                "Image metadata does not define a wavelength for every band.",
+            )
+        if band_indices is None:
+            return wavelengths.tolist()
+        return wavelengths[band_indices].tolist()
+
+    def _read_window(
+        self, box: PixelsBox, bands: list[int] | None = None
+    ) -> np.ndarray:
+        image = self._shared_cube()
+        if image is not None:
+            window = image[box.slices()]
+            return window if bands is None else window[:, :, bands]
+        return self._sp_file.read_subregion(
+            (box.v_min, box.v_max + 1), (box.u_min, box.u_max + 1), bands
+        )
+
+    def _gather_pixels(
+        self, v: np.ndarray, u: np.ndarray, bands: list[int] | None = None
+    ) -> np.ndarray:
+        # Read only the row runs touched by the pixels, each run as one region
+        order = np.argsort(v, kind="stable")
+        v_sorted = v[order]
+        u_sorted = u[order]
+        bands_count = self.bands if bands is None else len(bands)
+        row_bytes = self.cols * bands_count * np.dtype(self._sp_file.dtype).itemsize
+        max_run_rows = max(1, _READ_BLOCK_BYTES // max(row_bytes, 1))
+
+        signals_arr = None
+        for start, stop in _coalesce_row_runs(v_sorted, max_run_rows):
+            v_run = v_sorted[start:stop]
+            u_run = u_sorted[start:stop]
+            row_min, col_min = v_run[0], u_run.min()
+            region = self._sp_file.read_subregion(
+                (row_min, v_run[-1] + 1), (col_min, u_run.max() + 1), bands
+            )
+            if signals_arr is None:
+                signals_arr = np.empty((len(v), bands_count), dtype=region.dtype)
+            signals_arr[order[start:stop]] = region[v_run - row_min, u_run - col_min]
+
+        if signals_arr is None:
+            signals_arr = np.empty((0, bands_count), dtype=self._sp_file.dtype)
+        return signals_arr
+
+    def _read_spans(
+        self, spans: np.ndarray, bands: list[int] | None = None
+    ) -> np.ndarray:
+        # Each span is copied as one contiguous slice, in row-major order
+        bands_count = self.bands if bands is None else len(bands)
+        lengths = spans[:, 2] - spans[:, 1] + 1
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        image = self._shared_cube()
+        if image is not None:
+            signals_arr = np.empty((offsets[-1], bands_count), dtype=image.dtype)
+            for (v, u_start, u_end), start, stop in zip(
+                spans, offsets[:-1], offsets[1:]
+            ):
+                row = image[v, u_start : u_end + 1]
+                signals_arr[start:stop] = row if bands is None else row[:, bands]
+            return signals_arr
+
+        row_bytes = self.cols * bands_count * np.dtype(self._sp_file.dtype).itemsize
+        max_run_rows = max(1, _READ_BLOCK_BYTES // max(row_bytes, 1))
+        signals_arr = np.empty((offsets[-1], bands_count), dtype=self._sp_file.dtype)
+        for run_start, run_stop in _coalesce_row_runs(spans[:, 0], max_run_rows):
+            run = spans[run_start:run_stop]
+            row_min, col_min = run[0, 0], run[:, 1].min()
+            region = self._sp_file.read_subregion(
+                (row_min, run[-1, 0] + 1), (col_min, run[:, 2].max() + 1), bands
+            )
+            for (v, u_start, u_end), start, stop in zip(
+                run - (row_min, col_min, col_min),
+                offsets[run_start:run_stop],
+                offsets[run_start + 1 : run_stop + 1],
+            ):
+                signals_arr[start:stop] = region[v, u_start : u_end + 1]
+        return signals_arr
+
+    def _parsed(self, key: str, parse: Callable[[dict[str, Any]], Any]) -> Any:
+        # Parsed views are memoized until the metadata dict is replaced
+        metadata = self.metadata
+        if self._parsed_metadata_source is not metadata:
+            self._parsed_metadata.clear()
+            self._parsed_metadata_source = metadata
+        if key not in self._parsed_metadata:
+            self._parsed_metadata[key] = parse(metadata)
+        return self._parsed_metadata[key]
+
+    def _cache_key(self) -> tuple[str, int]:
+        filepath = self.filepath.resolve()
+        return (str(filepath), os.stat(filepath).st_mtime_ns)
+
+    def _shared_cube(self) -> np.ndarray | None:
+        # Memory-mapped view or cached cube; shared between calls, never mutated
+        if self.memmap:
+            return self.open_memmap()
+        if not self.cube_cache.enabled:
+            return None
+        # Cubes over the cache budget would be decoded in full only to be dropped,
+        # so they are read through the windowed paths instead
+        cube_bytes = self.rows * self.cols * self.bands
+        cube_bytes *= np.dtype(self._sp_file.dtype).itemsize
+        if cube_bytes > self.cube_cache.max_bytes:
+            return None
+        image = self.cube_cache.get(self._cache_key())
+        if image is None:
+            image = self._sp_file[:, :, :]
+            self.cube_cache.put(self._cache_key(), image)
+        return image
+
+    def _cached_cube(self) -> np.ndarray | None:
+        if self.memmap or not self.cube_cache.enabled:
+            return None
+        return self.cube_cache.get(self._cache_key())
 
     def _remove_nan(self, image: np.ndarray, nan_value: float = 0.0) -> np.ndarray:
         image_mask = np.bitwise_not(np.bool_(np.isnan(image).sum(axis=2)))
@@ -277,6 +688,55 @@ class SpectralImage:
         return image
 
 
+def _normalize_axes(
+    axis: int | tuple[int, ...] | Sequence[int] | None, ndim: int
+) -> tuple[int, ...]:
+    if axis is None:
+        return tuple(range(ndim))
+    axes = (axis,) if isinstance(axis, int) else tuple(axis)
+    if not all(-ndim <= a < ndim for a in axes):
+        raise InvalidInputError(
+            {
+                "axis": axis,
+                "ndim": ndim,
+            },
+            "Axis is out of bounds for the image array.",
+        )
+    return tuple(sorted({a % ndim for a in axes}))
+
+
+def _coalesce_row_runs(
+    v_sorted: np.ndarray, max_run_rows: int
+) -> Iterator[tuple[int, int]]:
+    # Yields [start, stop) index ranges of sorted rows that form contiguous runs
+    if not len(v_sorted):
+        return
+    breaks = np.nonzero(np.diff(v_sorted) > 1)[0] + 1
+    bounds = np.concatenate(([0], breaks, [len(v_sorted)]))
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        # Split long runs so a single region read stays bounded
+        while start < stop:
+            split = start + np.searchsorted(
+                v_sorted[start:stop], v_sorted[start] + max_run_rows
+            )
+            yield int(start), int(split)
+            start = split
+
+
+def _parse_default_bands(metadata: dict[str, Any]) -> list[int]:
+    return list(map(int, metadata.get("default bands", [])))
+
+
+def _parse_wavelengths(metadata: dict[str, Any]) -> np.ndarray:
+    wavelengths = np.array(metadata.get("wavelength", []), dtype=np.float64)
+    wavelengths.setflags(write=False)
+    return wavelengths
+
+
+def _parse_metadata_description(metadata: dict[str, Any]) -> dict[str, Any]:
+    return _parse_description(metadata.get("description", {}))
+
+
 def _parse_description(description: str) -> dict[str, Any]:
     def _parse():
         data_dict = {}
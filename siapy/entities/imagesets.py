@@ -1,24 +1,44 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Iterator, Sequence
+from typing import Any, Iterable, Iterator, Literal, Sequence
 
-import numpy as np
+import spectral as sp
 from rich.progress import track
 
 from siapy.core import logger
-from siapy.core.exceptions import InvalidInputError
+from siapy.core.exceptions import (
+    InvalidFilepathError,
+    InvalidInputError,
+    MethodNotImplementedError,
+    ProcessingError,
+)
 
-from .images import SpectralImage
+from .images import SpectralImage, _parse_description
 
 __all__ = [
     "SpectralImageSet",
+    "LazySpectralImageSet",
+    "MetadataKey",
 ]
 
+MetadataKey = Literal["camera_id", "acquisition_time", "wavelengths", "shape"]
+METADATA_KEYS: tuple[MetadataKey, ...] = (
+    "camera_id",
+    "acquisition_time",
+    "wavelengths",
+    "shape",
+)
+
 
 @dataclass
 class SpectralImageSet:
     def __init__(self, spectral_images: list[SpectralImage] | None = None):
-        self._images = spectral_images if spectral_images is not None else []
+        self._images = _ImageList(
+            self, spectral_images if spectral_images is not None else []
+        )
+        self._metadata_index: dict[MetadataKey, dict[Any, list[int]]] | None = None
 
     def __len__(self) -> int:
         return len(self.images)
@@ -38,6 +58,8 @@ class SpectralImageSet:
         *,
         header_paths: Sequence[str | Path],
         image_paths: Sequence[str | Path] | None = None,
+        max_workers: int = 1,
+        skip_errors: bool = False,
     ):
         if image_paths is not None and len(header_paths) != len(image_paths):
             raise InvalidInputError(
@@ -47,23 +69,48 @@ class SpectralImageSet:
                 },
                 "The length of hdr_paths and img_path must be equal.",
             )
+        if max_workers < 1:
+            raise InvalidInputError(
+                {
+                    "max_workers": max_workers,
+                },
+                "The number of workers must be at least 1.",
+            )
 
-        if image_paths is None:
-            spectral_images = [
-                SpectralImage.envi_open(header_path=hdr_path)
-                for hdr_path in track(
-                    header_paths, description="Loading spectral images..."
+        image_paths_or_none: list[str | Path | None] = (
+            list(image_paths) if image_paths is not None else [None] * len(header_paths)
+        )
+        paths = list(zip(header_paths, image_paths_or_none))
+        spectral_images = []
+        errors: list[tuple[str | Path, Exception]] = []
+        start_time = time.perf_counter()
+        # Headers are opened concurrently, results are collected in input order
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    SpectralImage.envi_open, header_path=hdr_path, image_path=img_path
                 )
+                for hdr_path, img_path in paths
             ]
-        else:
-            spectral_images = [
-                SpectralImage.envi_open(header_path=hdr_path, image_path=img_path)
-                for hdr_path, img_path in track(
-                    zip(header_paths, image_paths),
-                    description="Loading spectral images...",
-                )
-            ]
-        logger.info("Spectral images loaded into memory.")
+            for (hdr_path, _), future in zip(
+                paths, track(futures, description="Loading spectral images...")
+            ):
+                try:
+                    spectral_images.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Failed to load spectral image {hdr_path}: {e}")
+                    errors.append((hdr_path, e))
+
+        elapsed_time = time.perf_counter() - start_time
+        logger.info(
+            f"Loaded {len(spectral_images)} spectral images in {elapsed_time:.2f} s "
+            f"({len(spectral_images) / max(elapsed_time, 1e-9):.1f} images/s)."
+        )
+        if errors and not skip_errors:
+            raise ProcessingError(
+                f"Failed to load {len(errors)} of {len(paths)} spectral images: "
+                + "; ".join(f"{hdr_path}: {e}" for hdr_path, e in errors)
+            ) from errors[0][1]
         return cls(spectral_images)
 
     @property
@@ -72,12 +119,281 @@ class SpectralImageSet:
 
     @property
     def cameras_id(self) -> list[str]:
-        return list({image.camera_id for image in self.images})
+        return list(self._index()["camera_id"].keys())
+
+    def header(self, index: int) -> dict[str, Any]:
+        return self.images[index].metadata
 
     def images_by_camera_id(self, camera_id: str):
-        ids = np.array([image.camera_id for image in self.images])
-        indices = np.nonzero(ids == camera_id)[0]
-        return [image for idx, image in enumerate(self.images) if idx in indices]
+        return self.images_by_metadata(camera_id=camera_id)
+
+    def images_by_metadata(
+        self,
+        *,
+        camera_id: str | None = None,
+        acquisition_time: str | None = None,
+        wavelengths: Sequence[float] | None = None,
+        shape: tuple[int, int, int] | None = None,
+    ) -> list[SpectralImage]:
+        criteria: dict[MetadataKey, Any] = {
+            "camera_id": camera_id,
+            "acquisition_time": acquisition_time,
+            "wavelengths": None
+            if wavelengths is None
+            else tuple(map(float, wavelengths)),
+            "shape": None if shape is None else tuple(map(int, shape)),
+        }
+        index = self._index()
+        selected: set[int] | None = None
+        for key, value in criteria.items():
+            if value is None:
+                continue
+            matches = set(index[key].get(value, []))
+            selected = matches if selected is None else selected & matches
+        indices = range(len(self)) if selected is None else sorted(selected)
+        return [self[idx] for idx in indices]
+
+    def group_by(self, key: MetadataKey) -> dict[Any, list[SpectralImage]]:
+        if key not in METADATA_KEYS:
+            raise InvalidInputError(
+                {
+                    "key": key,
+                    "allowed_keys": METADATA_KEYS,
+                },
+                "Unsupported metadata key.",
+            )
+        return {
+            value: [self[idx] for idx in indices]
+            for value, indices in self._index()[key].items()
+        }
+
+    def append(self, image: SpectralImage):
+        self._images.append(image)
+
+    def extend(self, images: Sequence[SpectralImage]):
+        self._images.extend(images)
 
     def sort(self, key: Any = None, reverse: bool = False):
-        self.images.sort(key=key, reverse=reverse)
+        self._images.sort(key=key, reverse=reverse)
+
+    def _index(self) -> dict[MetadataKey, dict[Any, list[int]]]:
+        # Built once from headers. Edits of the images list are reported by the
+        # list itself, so a lookup only checks whether the index exists.
+        if self._metadata_index is None:
+            self._metadata_index = {key: {} for key in METADATA_KEYS}
+            self._add_to_index(self._metadata_index, range(len(self)))
+        return self._metadata_index
+
+    def _add_to_index(
+        self, metadata_index: dict[MetadataKey, dict[Any, list[int]]], indices: range
+    ):
+        for idx in indices:
+            for key, value in _header_index_values(self.header(idx)).items():
+                metadata_index[key].setdefault(value, []).append(idx)
+
+    def _on_images_added(self, count: int):
+        # Appended images extend an existing index instead of rebuilding it
+        if self._metadata_index is not None:
+            self._add_to_index(
+                self._metadata_index, range(len(self) - count, len(self))
+            )
+
+    def _invalidate_index(self):
+        self._metadata_index = None
+
+
+class _ImageList(list[SpectralImage]):
+    # Reports in-place edits to its image set, which keeps the metadata index
+    # current; unpickled lists have no set until their state is restored
+    _owner: SpectralImageSet | None = None
+
+    def __init__(self, owner: SpectralImageSet, images: Iterable[SpectralImage]):
+        super().__init__(images)
+        self._owner = owner
+
+    def append(self, image: SpectralImage):
+        super().append(image)
+        self._added(1)
+
+    def extend(self, images: Iterable[SpectralImage]):
+        size = len(self)
+        super().extend(images)
+        self._added(len(self) - size)
+
+    def __iadd__(self, images: Iterable[SpectralImage]) -> "_ImageList":  # type: ignore
+        self.extend(images)
+        return self
+
+    def insert(self, *args: Any, **kwargs: Any):
+        super().insert(*args, **kwargs)
+        self._changed()
+
+    def remove(self, *args: Any, **kwargs: Any):
+        super().remove(*args, **kwargs)
+        self._changed()
+
+    def pop(self, *args: Any, **kwargs: Any) -> SpectralImage:
+        image = super().pop(*args, **kwargs)
+        self._changed()
+        return image
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def sort(self, *args: Any, **kwargs: Any):
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super().reverse()
+        self._changed()
+
+    def __setitem__(self, *args: Any, **kwargs: Any):
+        super().__setitem__(*args, **kwargs)
+        self._changed()
+
+    def __delitem__(self, *args: Any, **kwargs: Any):
+        super().__delitem__(*args, **kwargs)
+        self._changed()
+
+    def __imul__(self, *args: Any, **kwargs: Any) -> "_ImageList":  # type: ignore
+        super().__imul__(*args, **kwargs)
+        self._changed()
+        return self
+
+    def _added(self, count: int):
+        if self._owner is not None:
+            self._owner._on_images_added(count)
+
+    def _changed(self):
+        if self._owner is not None:
+            self._owner._invalidate_index()
+
+
+class LazySpectralImageSet(SpectralImageSet):
+    def __init__(
+        self,
+        header_paths: Sequence[str | Path] | None = None,
+        image_paths: Sequence[str | Path] | None = None,
+    ):
+        header_paths = header_paths if header_paths is not None else []
+        if image_paths is not None and len(header_paths) != len(image_paths):
+            raise InvalidInputError(
+                {
+                    "header_paths_length": len(header_paths),
+                    "image_paths_length": len(image_paths),
+                },
+                "The length of hdr_paths and img_path must be equal.",
+            )
+        self._header_paths = [Path(hdr_path) for hdr_path in header_paths]
+        self._image_paths: list[Path | None] = (
+            [Path(img_path) for img_path in image_paths]
+            if image_paths is not None
+            else [None] * len(header_paths)
+        )
+        self._images_opened: list[SpectralImage | None] = [None] * len(header_paths)
+        self._headers: list[dict[str, Any] | None] = [None] * len(header_paths)
+        self._metadata_index = None
+
+    def __len__(self) -> int:
+        return len(self._header_paths)
+
+    def __iter__(self) -> Iterator[SpectralImage]:
+        return (self._open(idx) for idx in range(len(self)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._open(idx) for idx in range(len(self))[index]]
+        return self._open(range(len(self))[index])
+
+    @classmethod
+    def from_paths(
+        cls,
+        *,
+        header_paths: Sequence[str | Path],
+        image_paths: Sequence[str | Path] | None = None,
+        **kwargs: Any,
+    ):
+        # Loading options of SpectralImageSet.from_paths have no effect here
+        if kwargs:
+            raise InvalidInputError(
+                {
+                    "unexpected_arguments": sorted(kwargs),
+                },
+                "LazySpectralImageSet.from_paths does not open images and takes no "
+                "loading options.",
+            )
+        image_set = cls(header_paths, image_paths)
+        logger.info(f"Registered {len(image_set)} spectral images for lazy loading.")
+        return image_set
+
+    @property
+    def images(self) -> list[SpectralImage]:
+        return list(self)
+
+    @property
+    def header_paths(self) -> list[Path]:
+        return self._header_paths.copy()
+
+    def append(self, image: SpectralImage):
+        raise MethodNotImplementedError(self.__class__.__name__, "append")
+
+    def extend(self, images: Sequence[SpectralImage]):
+        raise MethodNotImplementedError(self.__class__.__name__, "extend")
+
+    def sort(self, key: Any = None, reverse: bool = False):
+        # Without a key images are ordered by header file name, known for opened
+        # and unopened images alike
+        order = sorted(
+            range(len(self)),
+            key=(lambda idx: self._header_paths[idx].name)
+            if key is None
+            else (lambda idx: key(self._open(idx))),
+            reverse=reverse,
+        )
+        self._header_paths = [self._header_paths[idx] for idx in order]
+        self._image_paths = [self._image_paths[idx] for idx in order]
+        self._images_opened = [self._images_opened[idx] for idx in order]
+        self._headers = [self._headers[idx] for idx in order]
+        self._invalidate_index()
+
+    def is_opened(self, index: int) -> bool:
+        return self._images_opened[index] is not None
+
+    def header(self, index: int) -> dict[str, Any]:
+        image = self._images_opened[index]
+        if image is not None:
+            return image.metadata
+        header = self._headers[index]
+        if header is None:
+            # Parse only the header file, the image file is not touched
+            hdr_path = self._header_paths[index]
+            if not hdr_path.exists():
+                raise InvalidFilepathError(str(hdr_path))
+            header = sp.envi.read_envi_header(str(hdr_path))
+            self._headers[index] = header
+        return header
+
+    def _open(self, index: int) -> SpectralImage:
+        image = self._images_opened[index]
+        if image is None:
+            image = SpectralImage.envi_open(
+                header_path=self._header_paths[index],
+                image_path=self._image_paths[index],
+            )
+            self._images_opened[index] = image
+            self._headers[index] = None
+        return image
+
+
+def _header_index_values(header: dict[str, Any]) -> dict[MetadataKey, Any]:
+    description = header.get("description")
+    camera_id = _parse_description(description).get("ID", "") if description else ""
+    shape = tuple(int(header.get(key, 0)) for key in ("lines", "samples", "bands"))
+    return {
+        "camera_id": camera_id,
+        "acquisition_time": header.get("acquisition time", ""),
+        "wavelengths": tuple(float(w) for w in header.get("wavelength", [])),
+        "shape": shape,
+    }
@@ -1,12 +1,16 @@
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Annotated, ClassVar, Iterable, NamedTuple, Sequence
+from typing import Annotated, Any, ClassVar, Iterable, NamedTuple, Sequence
 
 import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike
+
+from siapy.core.exceptions import InvalidInputError
 
 __all__ = [
     "Pixels",
+    "PixelsBox",
+    "SpanPixels",
 ]
 
 
@@ -16,13 +20,34 @@ class Coordinates(NamedTuple):
     H: Annotated[str, "h - homogeneous coordinate"] = "h"
 
 
-@dataclass
 class Pixels:
-    _data: pd.DataFrame
+    # Coordinates live in two contiguous arrays; pandas is only used on request
+    __slots__ = ("_u", "_v", "_data", "_index", "_box")
     coords: ClassVar[Coordinates] = Coordinates()
 
+    def __init__(self, data: pd.DataFrame):
+        # u and v can be views into data, so callers hand the frame over and
+        # leave it alone; later edits would shift the coordinates as well
+        self._u = _as_coordinates(data[Pixels.coords.U])
+        self._v = _as_coordinates(data[Pixels.coords.V])
+        self._data: pd.DataFrame | None = data
+        self._index: pd.Index | None = None
+        self._box: PixelsBox | None = None
+
+    def __repr__(self) -> str:
+        u, v = self._coordinates()
+        return f"{type(self).__name__}(u={u!r}, v={v!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Pixels):
+            return NotImplemented
+        return self is other or (
+            np.array_equal(self.u_array(), other.u_array())
+            and np.array_equal(self.v_array(), other.v_array())
+        )
+
     def __len__(self) -> int:
-        return len(self.df)
+        return len(self._coordinates()[0])
 
     @classmethod
     def from_iterable(
@@ -35,8 +60,30 @@ class Pixels:
             | Sequence[int]
         ],
     ) -> "Pixels":
-        df = pd.DataFrame(iterable, columns=[Pixels.coords.U, Pixels.coords.V])
-        return cls(df)
+        points = np.asarray(list(iterable))
+        if not points.size:
+            points = np.empty((0, 2), dtype=np.int32)
+        return cls.from_arrays(points[:, 0], points[:, 1])
+
+    @classmethod
+    def from_arrays(cls, u: ArrayLike, v: ArrayLike) -> "Pixels":
+        u_arr = _as_coordinates(u)
+        v_arr = _as_coordinates(v)
+        if u_arr.shape != v_arr.shape or u_arr.ndim != 1:
+            raise InvalidInputError(
+                {
+                    "u_shape": u_arr.shape,
+                    "v_shape": v_arr.shape,
+                },
+                "Coordinates u and v must be one-dimensional arrays of equal length.",
+            )
+        pixels = object.__new__(Pixels)
+        pixels._u = u_arr
+        pixels._v = v_arr
+        pixels._data = None
+        pixels._index = None
+        pixels._box = None
+        return pixels
 
     @classmethod
     def load_from_parquet(cls, filepath: str | Path) -> "Pixels":
@@ -45,21 +92,191 @@ class Pixels:
 
     @property
     def df(self) -> pd.DataFrame:
-        return self._data
+        # Copies, so edits of the returned frame cannot desync the coordinate arrays
+        return self._frame().copy()
 
     def df_homogenious(self) -> pd.DataFrame:
-        df_homo = self.df.copy()
+        df_homo = self._frame().copy()
         df_homo[Pixels.coords.H] = 1
         return df_homo
 
     def u(self) -> pd.Series:
-        return self.df[Pixels.coords.U]
+        return self._frame()[Pixels.coords.U].copy()
 
     def v(self) -> pd.Series:
-        return self.df[Pixels.coords.V]
+        return self._frame()[Pixels.coords.V].copy()
+
+    def u_array(self) -> np.ndarray:
+        return self._coordinates()[0]
+
+    def v_array(self) -> np.ndarray:
+        return self._coordinates()[1]
 
     def to_numpy(self) -> np.ndarray:
-        return self.df.to_numpy()
+        return np.column_stack(self._coordinates())
+
+    def box(self) -> "PixelsBox":
+        if self._box is None:
+            u, v = self._coordinates()
+            if not len(u):
+                raise InvalidInputError(
+                    {
+                        "pixels": 0,
+                    },
+                    "Cannot compute the bounding box of empty pixels.",
+                )
+            self._box = PixelsBox(
+                int(u.min()), int(v.min()), int(u.max()), int(v.max())
+            )
+        return self._box
+
+    def select(self, rows: slice | np.ndarray) -> "Pixels":
+        # Positional selection; row labels of the pandas view are preserved
+        if self._data is not None:
+            return Pixels(self._data.iloc[rows])
+        u, v = self._coordinates()
+        pixels = Pixels.from_arrays(u[rows], v[rows])
+        index = self._index if self._index is not None else pd.RangeIndex(len(u))
+        pixels._index = index[rows]
+        return pixels
 
     def save_to_parquet(self, filepath: str | Path) -> None:
-        self.df.to_parquet(filepath, index=True)
+        self._frame().to_parquet(filepath, index=True)
+
+    def _frame(self) -> pd.DataFrame:
+        if self._data is None:
+            u, v = self._coordinates()
+            self._data = pd.DataFrame(
+                {Pixels.coords.U: u, Pixels.coords.V: v}, index=self._index
+            )
+        return self._data
+
+    def _coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        return self._u, self._v
+
+
+class PixelsBox(NamedTuple):
+    u_min: Annotated[int, "left column, inclusive"]
+    v_min: Annotated[int, "top row, inclusive"]
+    u_max: Annotated[int, "right column, inclusive"]
+    v_max: Annotated[int, "bottom row, inclusive"]
+
+    @classmethod
+    def from_corners(cls, pixels: Pixels) -> "PixelsBox":
+        return pixels.box()
+
+    @property
+    def width(self) -> int:
+        return self.u_max - self.u_min + 1
+
+    @property
+    def height(self) -> int:
+        return self.v_max - self.v_min + 1
+
+    @property
+    def size(self) -> int:
+        return self.width * self.height
+
+    def slices(self) -> tuple[slice, slice]:
+        return slice(self.v_min, self.v_max + 1), slice(self.u_min, self.u_max + 1)
+
+    def to_pixels(self) -> Pixels:
+        # Column-major order: all rows of the first column, then the next column
+        u = np.repeat(np.arange(self.u_min, self.u_max + 1), self.height)
+        v = np.tile(np.arange(self.v_min, self.v_max + 1), self.width)
+        return Pixels.from_arrays(u, v)
+
+
+class SpanPixels(Pixels):
+    # Pixels stored as (v, u_start, u_end) row spans with inclusive u bounds
+    __slots__ = ("_spans",)
+
+    def __init__(self, spans: np.ndarray | Sequence[Sequence[int]]):
+        spans_array: np.ndarray = np.asarray(spans, dtype=np.int64).reshape(-1, 3)
+        invalid = spans_array[:, 1] > spans_array[:, 2]
+        if np.any(invalid):
+            raise InvalidInputError(
+                {
+                    "spans": spans_array[invalid].tolist(),
+                },
+                "Span start must not be greater than span end.",
+            )
+        # Row-major order, as produced by a scanline fill
+        spans_array = spans_array[np.lexsort((spans_array[:, 1], spans_array[:, 0]))]
+        spans_array.setflags(write=False)
+        self._spans = spans_array
+        self._u = None  # type: ignore[assignment]
+        self._v = None  # type: ignore[assignment]
+        self._data = None
+        self._index = None
+        self._box = None
+
+    def __repr__(self) -> str:
+        return f"SpanPixels(spans={len(self._spans)}, pixels={len(self)})"
+
+    def __len__(self) -> int:
+        return int(self.lengths().sum())
+
+    @classmethod
+    def from_box(cls, box: PixelsBox) -> "SpanPixels":
+        rows = np.arange(box.v_min, box.v_max + 1)
+        return cls(
+            np.column_stack(
+                (
+                    rows,
+                    np.full(len(rows), box.u_min),
+                    np.full(len(rows), box.u_max),
+                )
+            )
+        )
+
+    @property
+    def spans(self) -> np.ndarray:
+        return self._spans
+
+    def is_expanded(self) -> bool:
+        return self._u is not None
+
+    def lengths(self) -> np.ndarray:
+        return self._spans[:, 2] - self._spans[:, 1] + 1
+
+    def box(self) -> PixelsBox:
+        if not len(self._spans):
+            raise InvalidInputError(
+                {
+                    "spans": 0,
+                },
+                "Cannot compute the bounding box of empty spans.",
+            )
+        return PixelsBox(
+            int(self._spans[:, 1].min()),
+            int(self._spans[0, 0]),
+            int(self._spans[:, 2].max()),
+            int(self._spans[-1, 0]),
+        )
+
+    def _coordinates(self) -> tuple[np.ndarray, np.ndarray]:
+        # Explicit coordinates are only materialized on first access
+        if self._u is None:
+            lengths = self.lengths()
+            offsets = np.arange(lengths.sum()) - np.repeat(
+                np.cumsum(lengths) - lengths, lengths
+            )
+            self._u = _as_coordinates(np.repeat(self._spans[:, 1], lengths) + offsets)
+            self._v = _as_coordinates(np.repeat(self._spans[:, 0], lengths))
+        return self._u, self._v
+
+
+def _as_coordinates(values: ArrayLike) -> np.ndarray:
+    # Integer coordinates are stored as int32, fractional ones as float64
+    array = np.asarray(values)
+    if array.dtype == object:
+        array = np.asarray(array.tolist())
+    dtype: type[np.number]
+    if not array.size or np.issubdtype(array.dtype, np.integer):
+        dtype = np.int32
+    else:
+        dtype = np.float64
+    array = np.ascontiguousarray(array, dtype=dtype)
+    array.setflags(write=False)
+    return array
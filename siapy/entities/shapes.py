@@ -3,11 +3,10 @@ from dataclasses import dataclass
 from typing import Any, Literal
 
 import numpy as np
-from matplotlib.path import Path
 
 from siapy.core.exceptions import InvalidInputError, MethodNotImplementedError
 
-from .pixels import Pixels
+from .pixels import Pixels, PixelsBox, SpanPixels
 
 __all__ = [
     "Shape",
@@ -81,16 +80,12 @@ class Rectangle(Shape):
     def __init__(self, pixels: Pixels, label: str | None = None, **kwargs: Any):
         super().__init__(SHAPE_TYPE_RECTANGLE, pixels, label)
 
-    def convex_hull(self) -> Pixels:
+    def box(self) -> PixelsBox:
         # Rectangle is defined by two opposite corners
-        u1, u2 = self.pixels.u()
-        v1, v2 = self.pixels.v()
+        return PixelsBox.from_corners(self.pixels)
 
-        pixels_inside = []
-        for u_coord in range(min(u1, u2), max(u1, u2) + 1):
-            for v_coord in range(min(v1, v2), max(v1, v2) + 1):
-                pixels_inside.append((u_coord, v_coord))
-        return Pixels.from_iterable(pixels_inside)
+    def convex_hull(self) -> Pixels:
+        return self.box().to_pixels()
 
 
 class Point(Shape):
@@ -102,23 +97,78 @@ class Point(Shape):
 
 
 class FreeDraw(Shape):
-    def __init__(self, pixels: Pixels, label: str | None = None, **kwargs: Any):
+    def __init__(
+        self,
+        pixels: Pixels,
+        label: str | None = None,
+        *,
+        cache: bool = True,
+        **kwargs: Any,
+    ):
         super().__init__(SHAPE_TYPE_FREEDRAW, pixels, label)
+        self._cache = cache
+        self._spans: np.ndarray | None = None
+
+    def spans(self) -> np.ndarray:
+        # Filled interior as (v, u_start, u_end) rows with inclusive u bounds
+        if self._spans is not None:
+            return self._spans
+        spans = _rasterize_polygon(self.pixels.to_numpy())
+        if self._cache:
+            spans.setflags(write=False)
+            self._spans = spans
+        return spans
 
     def convex_hull(self) -> Pixels:
         if len(self.pixels) < 3:
             return self.pixels
 
-        points = self.pixels.to_numpy()
-        points_path = Path(points)
-
-        # Create a grid of points that covers the convex hull area
-        u_min, v_min = points.min(axis=0)
-        u_max, v_max = points.max(axis=0)
-        u, v = np.meshgrid(np.arange(u_min, u_max + 1), np.arange(v_min, v_max + 1))
-        grid_points = np.vstack((u.flatten(), v.flatten())).T
-
-        # Filter points that are inside the convex hull
-        inside_points = grid_points[points_path.contains_points(grid_points)]
-
-        return Pixels.from_iterable(inside_points.tolist())
+        return SpanPixels(self.spans())
+
+
+def _rasterize_polygon(points: np.ndarray) -> np.ndarray:
+    # Scanline fill with the even-odd rule. Only edges crossing a row are visited,
+    # so memory grows with the number of edge/row intersections, not the area.
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3:
+        return np.empty((0, 3), dtype=np.int64)
+    x0, y0 = points[:, 0], points[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+
+    # Half-open rule: an edge covers rows min(y) < v <= max(y), so vertices
+    # shared by two edges are counted once and horizontal edges are skipped
+    y_low = np.minimum(y0, y1)
+    y_high = np.maximum(y0, y1)
+    first_row = np.floor(y_low).astype(np.int64) + 1
+    rows_count = np.maximum(np.floor(y_high).astype(np.int64) - first_row + 1, 0)
+    edges = np.flatnonzero(rows_count)
+    if not len(edges):
+        return np.empty((0, 3), dtype=np.int64)
+    rows_count = rows_count[edges]
+    edge_idx = np.repeat(edges, rows_count)
+    rows = np.repeat(first_row[edges], rows_count) + (
+        np.arange(rows_count.sum())
+        - np.repeat(np.cumsum(rows_count) - rows_count, rows_count)
+    )
+    slope = (x1 - x0)[edge_idx] / (y1 - y0)[edge_idx]
+    crossings = x0[edge_idx] + (rows - y0[edge_idx]) * slope
+
+    order = np.lexsort((crossings, rows))
+    rows = rows[order][::2]
+    crossings = crossings[order].reshape(-1, 2)
+    # Pixels lying exactly on an edge belong to the shape
+    eps = 1e-9
+    u_start = np.ceil(crossings[:, 0] - eps).astype(np.int64)
+    u_end = np.floor(crossings[:, 1] + eps).astype(np.int64)
+    keep = u_start <= u_end
+    rows, u_start, u_end = rows[keep], u_start[keep], u_end[keep]
+    if not len(rows):
+        return np.empty((0, 3), dtype=np.int64)
+
+    # Merge spans of the same row that touch at a shared vertex
+    new_span = np.ones(len(rows), dtype=bool)
+    new_span[1:] = (rows[1:] != rows[:-1]) | (u_start[1:] > u_end[:-1] + 1)
+    starts = np.flatnonzero(new_span)
+    return np.column_stack(
+        (rows[starts], u_start[starts], np.maximum.reduceat(u_end, starts))
+    )
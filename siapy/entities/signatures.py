@@ -1,9 +1,13 @@
+import uuid
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any, Iterator, NamedTuple, Sequence, TypeAlias
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 
 from siapy.core.exceptions import DirectInitializationError, InvalidInputError
 
@@ -12,12 +16,84 @@ from .pixels import Pixels
 __all__ = [
     "Signatures",
     "Signals",
+    "ParquetFiltersType",
+    "SignaturesBatch",
 ]
 
+# Row filters in pyarrow's disjunctive normal form, e.g. [("shape_label", "=", "a")]
+ParquetFiltersType: TypeAlias = (
+    ds.Expression | list[tuple[str, str, Any]] | list[list[tuple[str, str, Any]]]
+)
+
+
+class SignaturesBatch(NamedTuple):
+    pixels: Annotated[np.ndarray, "u, v coordinates, shape (n, 2)"]
+    signals: Annotated[np.ndarray, "signals, shape (n, bands)"]
+
 
-@dataclass
 class Signals:
-    _data: pd.DataFrame
+    # Signals are one contiguous 2-D array (pixels x bands); pandas is a view on it
+    __slots__ = ("_array", "_columns", "_data", "_index")
+
+    def __init__(self, data: pd.DataFrame):
+        # data is returned by df and the band array is taken from it on demand;
+        # editing it afterwards would change the signals behind their back
+        self._array: np.ndarray | None = None
+        self._columns = data.columns
+        self._data: pd.DataFrame | None = data
+        self._index: pd.Index | None = None
+
+    def __repr__(self) -> str:
+        return f"Signals(shape={self.shape}, dtype={self.dtype})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Signals):
+            return NotImplemented
+        if self is other:
+            return True
+        array, other_array = self.to_numpy(), other.to_numpy()
+        return self._columns.equals(other._columns) and np.array_equal(
+            array,
+            other_array,
+            equal_nan=np.issubdtype(array.dtype, np.inexact)
+            and np.issubdtype(other_array.dtype, np.inexact),
+        )
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    @classmethod
+    def from_array(
+        cls,
+        array: np.ndarray,
+        columns: pd.Index | Sequence[Any] | None = None,
+        dtype: np.dtype | type | str | None = None,
+    ) -> "Signals":
+        array = np.ascontiguousarray(array, dtype=dtype)
+        if array.ndim != 2:
+            raise InvalidInputError(
+                {
+                    "shape": array.shape,
+                },
+                "Signals must be a two-dimensional array of pixels x bands.",
+            )
+        columns_index = (
+            pd.RangeIndex(array.shape[1]) if columns is None else pd.Index(columns)
+        )
+        if len(columns_index) != array.shape[1]:
+            raise InvalidInputError(
+                {
+                    "columns_length": len(columns_index),
+                    "bands": array.shape[1],
+                },
+                "Each band must have exactly one column label.",
+            )
+        signals = object.__new__(cls)
+        signals._array = array
+        signals._columns = columns_index
+        signals._data = None
+        signals._index = None
+        return signals
 
     @classmethod
     def load_from_parquet(cls, filepath: str | Path) -> "Signals":
@@ -26,13 +102,67 @@ class Signals:
 
     @property
     def df(self) -> pd.DataFrame:
+        if self._data is None:
+            self._data = pd.DataFrame(
+                self._array, index=self._index, columns=self._columns, copy=False
+            )
         return self._data
 
+    @property
+    def columns(self) -> pd.Index:
+        return self._columns
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        if self._array is None and self._data is not None:
+            rows, cols = self._data.shape
+        else:
+            rows, cols = self.to_numpy().shape
+        return rows, cols
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.to_numpy().dtype
+
     def to_numpy(self) -> np.ndarray:
-        return self.df.to_numpy()
+        if self._array is None:
+            assert self._data is not None
+            self._array = self._data.to_numpy()
+        return self._array
+
+    def astype(self, dtype: np.dtype | type | str) -> "Signals":
+        return Signals.from_array(self.to_numpy(), columns=self._columns, dtype=dtype)
+
+    def select(
+        self,
+        rows: slice | np.ndarray = slice(None),
+        cols: slice | np.ndarray = slice(None),
+    ) -> "Signals":
+        # Positional selection; slices give views of the underlying array
+        if self._data is not None:
+            return Signals(self._data.iloc[rows, cols])
+        array = self.to_numpy()
+        if isinstance(rows, slice) or isinstance(cols, slice):
+            selected = array[rows][:, cols]
+        else:
+            selected = array[np.ix_(rows, cols)]
+        signals = object.__new__(Signals)
+        signals._array = selected
+        signals._columns = self._columns[cols]
+        signals._data = None
+        index = self._index if self._index is not None else pd.RangeIndex(len(array))
+        signals._index = index[rows]
+        return signals
 
     def mean(self) -> np.ndarray:
-        return np.nanmean(self.to_numpy(), axis=0)
+        array = self.to_numpy()
+        # Reduced precision storage is accumulated in at least float32
+        dtype = (
+            np.promote_types(array.dtype, np.float32)
+            if np.issubdtype(array.dtype, np.floating)
+            else None
+        )
+        return np.nanmean(array, axis=0, dtype=dtype)
 
     def save_to_parquet(self, filepath: str | Path) -> None:
         self.df.to_parquet(filepath, index=True)
@@ -40,24 +170,63 @@ class Signals:
 
 @dataclass
 class SignaturesFilter:
+    # Row and column selections are accumulated and applied once on access
     def __init__(self, pixels: Pixels, signals: Signals):
-        self.pixels = pixels
-        self.signals = signals
+        self._source_pixels = pixels
+        self._source_signals = signals
+        self._rows: slice | np.ndarray = slice(None)
+        self._cols: slice | np.ndarray = slice(None)
+        self._selected: tuple[Pixels, Signals] | None = None
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, SignaturesFilter):
+            return NotImplemented
+        return self.pixels == other.pixels and self.signals == other.signals
+
+    @property
+    def pixels(self) -> Pixels:
+        return self._materialize()[0]
+
+    @property
+    def signals(self) -> Signals:
+        return self._materialize()[1]
 
     def build(self) -> "Signatures":
-        return Signatures._create(self.pixels, self.signals)
+        return Signatures._create(*self._materialize())
 
     def rows(self, rows: list[int] | slice | list[bool]) -> "SignaturesFilter":
-        filtered_pixels_df = self.pixels.df.iloc[rows]
-        filtered_signals_df = self.signals.df.iloc[rows]
-        filtered_pixels = Pixels(pd.DataFrame(filtered_pixels_df))
-        filtered_signals = Signals(pd.DataFrame(filtered_signals_df))
-        return SignaturesFilter(filtered_pixels, filtered_signals)
+        filtered = self._copy()
+        filtered._rows = _compose_selection(self._rows, rows, len(self._source_signals))
+        return filtered
 
     def cols(self, cols: list[int] | slice | list[bool]) -> "SignaturesFilter":
-        filtered_signals_df = self.signals.df.iloc[:, cols]
-        filtered_signals = Signals(pd.DataFrame(filtered_signals_df))
-        return SignaturesFilter(self.pixels, filtered_signals)
+        filtered = self._copy()
+        filtered._cols = _compose_selection(
+            self._cols, cols, self._source_signals.shape[1]
+        )
+        return filtered
+
+    def _copy(self) -> "SignaturesFilter":
+        filtered = SignaturesFilter(self._source_pixels, self._source_signals)
+        filtered._rows = self._rows
+        filtered._cols = self._cols
+        return filtered
+
+    def _materialize(self) -> tuple[Pixels, Signals]:
+        if self._selected is None:
+            all_rows = _selects_all(self._rows)
+            pixels = (
+                self._source_pixels
+                if all_rows
+                else self._source_pixels.select(self._rows)
+            )
+            signals = (
+                self._source_signals
+                if all_rows and _selects_all(self._cols)
+                else self._source_signals.select(self._rows, self._cols)
+            )
+            self._selected = (pixels, signals)
+        return self._selected
 
 
 @dataclass
@@ -77,10 +246,26 @@ class Signatures:
 
     @classmethod
     def from_array_and_pixels(cls, image: np.ndarray, pixels: Pixels) -> "Signatures":
-        u = pixels.u()
-        v = pixels.v()
-        signals_list = image[v, u, :]
-        signals = Signals(pd.DataFrame(signals_list))
+        signals_list = image[pixels.v_array(), pixels.u_array(), :]
+        return cls.from_signals_and_pixels(signals_list, pixels)
+
+    @classmethod
+    def from_signals_and_pixels(
+        cls,
+        signals_arr: np.ndarray,
+        pixels: Pixels,
+        columns: pd.Index | Sequence[Any] | None = None,
+        dtype: np.dtype | type | str | None = None,
+    ) -> "Signatures":
+        if len(signals_arr) != len(pixels):
+            raise InvalidInputError(
+                {
+                    "signals_length": len(signals_arr),
+                    "pixels_length": len(pixels),
+                },
+                "Each pixel must have exactly one signal.",
+            )
+        signals = Signals.from_array(signals_arr, columns=columns, dtype=dtype)
         return cls._create(pixels, signals)
 
     @classmethod
@@ -97,9 +282,60 @@ class Signatures:
         return cls._create(pixels, signals)
 
     @classmethod
-    def load_from_parquet(cls, filepath: str | Path) -> "Signatures":
-        df = pd.read_parquet(filepath)
-        return cls.from_dataframe(df)
+    def load_from_parquet(
+        cls,
+        filepath: str | Path,
+        *,
+        columns: Sequence[Any] | None = None,
+        filters: ParquetFiltersType | None = None,
+    ) -> "Signatures":
+        # Works for single files and hive-partitioned directories. Band columns
+        # and row filters are pushed down, so only matching row groups are read.
+        dataset = ds.dataset(filepath, format="parquet", partitioning="hive")
+        read_columns = _parquet_columns(dataset, columns)
+        table = dataset.to_table(
+            columns=read_columns + _parquet_index_columns(dataset),
+            filter=_parquet_expression(filters),
+        )
+        return cls.from_dataframe(table.to_pandas())
+
+    @classmethod
+    def iter_parquet_batches(
+        cls,
+        filepath: str | Path,
+        batch_size: int,
+        *,
+        columns: Sequence[Any] | None = None,
+        filters: ParquetFiltersType | None = None,
+        dtype: np.dtype | type | str | None = None,
+    ) -> Iterator[SignaturesBatch]:
+        # Streams record batches from disk, so memory stays bounded by batch_size
+        _check_batch_size(batch_size)
+        dataset = ds.dataset(filepath, format="parquet", partitioning="hive")
+        read_columns = _parquet_columns(dataset, columns)
+        band_columns = read_columns[2:]
+        expression = _parquet_expression(filters)
+        pending: list[SignaturesBatch] = []
+        pending_rows = 0
+        for record_batch in dataset.to_batches(
+            columns=read_columns, filter=expression, batch_size=batch_size
+        ):
+            if not record_batch.num_rows:
+                continue
+            pending.append(_record_batch_to_numpy(record_batch, band_columns, dtype))
+            pending_rows += record_batch.num_rows
+            while pending_rows >= batch_size:
+                merged = _concat_batches(pending)
+                yield SignaturesBatch(
+                    merged.pixels[:batch_size], merged.signals[:batch_size]
+                )
+                rest = SignaturesBatch(
+                    merged.pixels[batch_size:], merged.signals[batch_size:]
+                )
+                pending = [rest] if len(rest.pixels) else []
+                pending_rows -= batch_size
+        if pending_rows:
+            yield _concat_batches(pending)
 
     @property
     def pixels(self) -> Pixels:
@@ -115,8 +351,173 @@ class Signatures:
     def to_numpy(self) -> np.ndarray:
         return self.to_dataframe().to_numpy()
 
+    def iter_batches(self, batch_size: int) -> Iterator[SignaturesBatch]:
+        # Signals batches are views; only the pixel pairs are stacked per batch
+        _check_batch_size(batch_size)
+        u = self.pixels.u_array()
+        v = self.pixels.v_array()
+        signals = self.signals.to_numpy()
+        for start in range(0, len(signals), batch_size):
+            stop = start + batch_size
+            yield SignaturesBatch(
+                np.column_stack((u[start:stop], v[start:stop])), signals[start:stop]
+            )
+
     def filter(self) -> SignaturesFilter:
         return SignaturesFilter(self.pixels, self.signals)
 
-    def save_to_parquet(self, filepath: str | Path) -> None:
-        self.to_dataframe().to_parquet(filepath, index=True)
+    def save_to_parquet(
+        self,
+        filepath: str | Path,
+        *,
+        row_group_size: int | None = None,
+        partition: dict[str, Any] | None = None,
+        append: bool = False,
+    ) -> None:
+        # Without partition, filepath is a single file. With partition, filepath is
+        # the root of a hive-partitioned archive; the partition is replaced, or a
+        # new part file is added to it when appending.
+        if partition is None:
+            table = pa.Table.from_pandas(self.to_dataframe(), preserve_index=True)
+            pq.write_table(table, filepath, row_group_size=row_group_size)
+            return
+
+        reserved = set(partition) & {Pixels.coords.U, Pixels.coords.V}
+        reserved |= set(partition) & set(map(str, self.signals.columns))
+        if not partition or reserved:
+            raise InvalidInputError(
+                {
+                    "partition": partition,
+                    "conflicting_columns": sorted(reserved),
+                },
+                "Partition keys must be non-empty and differ from pixel and signal columns.",
+            )
+        table = pa.Table.from_pandas(self.to_dataframe(), preserve_index=False)
+        for key, value in partition.items():
+            table = table.append_column(key, pa.repeat(value, len(table)))
+        ds.write_dataset(
+            table,
+            filepath,
+            format="parquet",
+            partitioning=list(partition),
+            partitioning_flavor="hive",
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+            if append
+            else "delete_matching",
+            max_rows_per_group=row_group_size or 1024 * 1024,
+            min_rows_per_group=0,
+        )
+
+
+def _selects_all(selection: slice | np.ndarray) -> bool:
+    return isinstance(selection, slice) and selection == slice(None)
+
+
+def _compose_selection(
+    current: slice | np.ndarray,
+    selection: list[int] | slice | list[bool] | np.ndarray,
+    length: int,
+) -> slice | np.ndarray:
+    # Expresses `selection` applied after `current` as one positional selection
+    if isinstance(current, slice) and isinstance(selection, slice):
+        composed = range(length)[current][selection]
+        stop = composed.stop if composed.stop >= 0 else None
+        return slice(composed.start, stop, composed.step)
+
+    positions = np.arange(length)[current] if isinstance(current, slice) else current
+    if isinstance(selection, slice):
+        return positions[selection]
+    selection_arr = np.asarray(selection)
+    if selection_arr.dtype == bool:
+        if len(selection_arr) != len(positions):
+            raise InvalidInputError(
+                {
+                    "mask_length": len(selection_arr),
+                    "selected_length": len(positions),
+                },
+                "Boolean selection must have one value per selected element.",
+            )
+        return positions[selection_arr]
+    if not len(selection_arr):
+        return positions[:0]
+    return positions[selection_arr.astype(np.intp)]
+
+
+def _partition_names(dataset: ds.Dataset) -> list[str]:
+    # Partition keys are dataset columns that are not stored in the files
+    fragment = next(iter(dataset.get_fragments()), None)
+    if fragment is None:
+        return []
+    stored = set(fragment.physical_schema.names)
+    return [name for name in dataset.schema.names if name not in stored]
+
+
+def _parquet_columns(
+    dataset: ds.Dataset, columns: Sequence[Any] | None = None
+) -> list[str]:
+    # u and v first, followed by the band columns
+    if columns is not None:
+        return [Pixels.coords.U, Pixels.coords.V] + [str(column) for column in columns]
+    excluded = set(_partition_names(dataset)) | {Pixels.coords.U, Pixels.coords.V}
+    return [Pixels.coords.U, Pixels.coords.V] + [
+        name
+        for name in dataset.schema.names
+        if name not in excluded and not name.startswith("__index_level_")
+    ]
+
+
+def _parquet_index_columns(dataset: ds.Dataset) -> list[str]:
+    # Stored pandas index columns, restored as the index by to_pandas()
+    index_columns = (dataset.schema.pandas_metadata or {}).get("index_columns", [])
+    return [
+        name
+        for name in index_columns
+        if isinstance(name, str) and name in dataset.schema.names
+    ]
+
+
+def _parquet_expression(filters: ParquetFiltersType | None) -> ds.Expression | None:
+    return pq.filters_to_expression(filters) if isinstance(filters, list) else filters
+
+
+def _record_batch_to_numpy(
+    record_batch: pa.RecordBatch,
+    band_columns: list[str],
+    dtype: np.dtype | type | str | None = None,
+) -> SignaturesBatch:
+    pixels = np.column_stack(
+        (
+            record_batch.column(Pixels.coords.U).to_numpy(zero_copy_only=False),
+            record_batch.column(Pixels.coords.V).to_numpy(zero_copy_only=False),
+        )
+    )
+    if dtype is None:
+        field_dtypes = [
+            record_batch.schema.field(name).type.to_pandas_dtype()
+            for name in band_columns
+        ]
+        dtype = np.result_type(*field_dtypes) if field_dtypes else np.float64
+    signals = np.empty((record_batch.num_rows, len(band_columns)), dtype=dtype)
+    for idx, name in enumerate(band_columns):
+        signals[:, idx] = record_batch.column(name).to_numpy(zero_copy_only=False)
+    return SignaturesBatch(pixels, signals)
+
+
+def _concat_batches(batches: list[SignaturesBatch]) -> SignaturesBatch:
+    if len(batches) == 1:
+        return batches[0]
+    return SignaturesBatch(
+        np.concatenate([batch.pixels for batch in batches]),
+        np.concatenate([batch.signals for batch in batches]),
+    )
+
+
+def _check_batch_size(batch_size: int) -> None:
+    if batch_size < 1:
+        raise InvalidInputError(
+            {
+                "batch_size": batch_size,
+            },
+            "Batch size must be a positive integer.",
+        )
@@ -0,0 +1,152 @@
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
+
+from siapy.core.exceptions import InvalidInputError
+
+__all__ = [
+    "ImageStats",
+    "StreamingStats",
+]
+
+
+@dataclass
+class ImageStats:
+    count: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    percentiles: dict[float, np.ndarray] = field(default_factory=dict)
+    histogram: np.ndarray | None = None
+    bin_edges: np.ndarray | None = None
+
+
+class StreamingStats:
+    def __init__(
+        self,
+        bands: int,
+        *,
+        percentiles: Sequence[float] = (),
+        sample_size: int = 100_000,
+        bins: int | None = None,
+        bins_range: tuple[float, float] | None = None,
+        seed: int | None = 0,
+    ):
+        if bins is not None and bins_range is None:
+            raise InvalidInputError(
+                {
+                    "bins": bins,
+                    "bins_range": bins_range,
+                },
+                "Single-pass histograms require an explicit bins_range.",
+            )
+        if bins_range is not None and not bins_range[0] < bins_range[1]:
+            raise InvalidInputError(
+                {
+                    "bins_range": bins_range,
+                },
+                "The lower bound of bins_range must be smaller than the upper bound.",
+            )
+        self._bands = bands
+        self._percentiles = tuple(percentiles)
+        self._bins = bins
+        self._bins_range = bins_range
+        self._rng = np.random.default_rng(seed)
+
+        self._count = np.zeros(bands, dtype=np.int64)
+        self._mean = np.zeros(bands, dtype=np.float64)
+        self._m2 = np.zeros(bands, dtype=np.float64)
+        self._min = np.full(bands, np.nan)
+        self._max = np.full(bands, np.nan)
+        self._histogram = (
+            np.zeros((bands, bins), dtype=np.int64) if bins is not None else None
+        )
+        # Uniform reservoir of pixels used to approximate percentiles
+        self._sample_size = sample_size if self._percentiles else 0
+        self._sample = np.empty((self._sample_size, bands), dtype=np.float64)
+        self._seen = 0
+
+    def update(self, block: np.ndarray) -> None:
+        block = np.asarray(block, dtype=np.float64).reshape(-1, self._bands)
+        if not len(block):
+            return
+        self._update_moments(block)
+        self._min = np.fmin(self._min, np.fmin.reduce(block, axis=0))
+        self._max = np.fmax(self._max, np.fmax.reduce(block, axis=0))
+        if self._histogram is not None:
+            self._update_histogram(block)
+        if self._sample_size:
+            self._update_sample(block)
+
+    def result(self) -> ImageStats:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self._count > 0, self._mean, np.nan)
+            std = np.sqrt(np.where(self._count > 0, self._m2 / self._count, np.nan))
+        sample = self._sample[: min(self._seen, self._sample_size)]
+        percentiles = {
+            q: (
+                np.nanpercentile(sample, q, axis=0)
+                if len(sample)
+                else np.full(self._bands, np.nan)
+            )
+            for q in self._percentiles
+        }
+        bin_edges = (
+            np.linspace(*self._bins_range, self._bins + 1)
+            if self._bins is not None and self._bins_range is not None
+            else None
+        )
+        return ImageStats(
+            count=self._count.copy(),
+            mean=mean,
+            std=std,
+            min=self._min.copy(),
+            max=self._max.copy(),
+            percentiles=percentiles,
+            histogram=None if self._histogram is None else self._histogram.copy(),
+            bin_edges=bin_edges,
+        )
+
+    def _update_moments(self, block: np.ndarray) -> None:
+        # Chan et al. parallel merge of per-block mean and sum of squared deviations
+        block_count = np.count_nonzero(~np.isnan(block), axis=0)
+        valid = block_count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            block_mean = np.where(valid, np.nansum(block, axis=0) / block_count, 0.0)
+        block_m2 = np.nansum((block - block_mean) ** 2, axis=0)
+
+        total = self._count + block_count
+        delta = block_mean - self._mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = np.where(valid, block_count / total, 0.0)
+        self._mean = self._mean + delta * ratio
+        self._m2 = self._m2 + block_m2 + delta**2 * self._count * ratio
+        self._count = total
+
+    def _update_histogram(self, block: np.ndarray) -> None:
+        assert self._histogram is not None and self._bins_range is not None
+        bins = self._histogram.shape[1]
+        low, high = self._bins_range
+        in_range = (block >= low) & (block <= high)
+        bin_idx = np.floor((block - low) / (high - low) * bins)
+        # The upper edge belongs to the last bin, as in np.histogram
+        bin_idx = np.clip(np.nan_to_num(bin_idx), 0, bins - 1).astype(np.int64)
+        flat_idx = (bin_idx + np.arange(self._bands) * bins)[in_range]
+        self._histogram += np.bincount(flat_idx, minlength=self._bands * bins).reshape(
+            self._bands, bins
+        )
+
+    def _update_sample(self, block: np.ndarray) -> None:
+        # Vectorized reservoir sampling (Algorithm R)
+        n_fill = max(0, min(self._sample_size - self._seen, len(block)))
+        if n_fill:
+            self._sample[self._seen : self._seen + n_fill] = block[:n_fill]
+        rest = block[n_fill:]
+        if len(rest):
+            positions = self._seen + n_fill + np.arange(len(rest))
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self._sample_size
+            self._sample[slots[keep]] = rest[keep]
+        self._seen += len(block)
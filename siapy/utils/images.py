@@ -201,13 +201,7 @@ def calculate_correction_factor_from_panel(
         panel_radiance_mean = panel_signatures.signals.mean()
 
     else:
-        temp_mean = image.mean(axis=(0, 1))
-        if not isinstance(temp_mean, np.ndarray):
-            raise InvalidInputError(
-                input_value={"image": image},
-                message=f"Expected image.mean(axis=(0, 1)) to return np.ndarray, but got {type(temp_mean).__name__}.",
-            )
-        panel_radiance_mean = temp_mean
+        panel_radiance_mean = image.stats().mean
 
     panel_reflectance_mean = np.full(image.bands, panel_reference_reflectance)
     panel_correction = panel_reflectance_mean / panel_radiance_mean
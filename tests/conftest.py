@@ -1,7 +1,10 @@
+from pathlib import Path
 from types import SimpleNamespace
+from typing import Any
 
 import numpy as np
 import pytest
+import spectral as sp
 from sklearn.datasets import make_classification
 
 from siapy.core.configs import TEST_DATA_DIR
@@ -124,3 +127,27 @@ def mock_sklearn_dataset():
         n_samples=100, n_features=10, n_classes=2, random_state=0
     )
     return X, y
+
+
+@pytest.fixture
+def save_envi_image(tmp_path):
+    # Writes a small ENVI image into the test's tmp_path and returns its header path
+    def _save_envi_image(
+        name: str,
+        image: np.ndarray,
+        *,
+        metadata: dict[str, Any] | None = None,
+        interleave: str = "bil",
+    ) -> Path:
+        header_path = tmp_path / f"{name}.hdr"
+        sp.envi.save_image(
+            header_path,
+            image,
+            metadata=metadata if metadata is not None else {},
+            interleave=interleave,
+            dtype=image.dtype,
+            force=True,
+        )
+        return header_path
+
+    return _save_envi_image
@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pytest
+
+from siapy.core.cache import ArrayCache, CacheInfo, DiskArrayCache
+from siapy.core.exceptions import InvalidInputError
+
+
+def test_cache_disabled_by_default():
+    cache = ArrayCache()
+    assert not cache.enabled
+    cache.put("a", np.zeros(10))
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_hits_and_misses():
+    cache = ArrayCache(max_bytes=1024)
+    array = np.zeros(10)
+    assert cache.get("a") is None
+    cache.put("a", array)
+    assert cache.get("a") is array
+    assert not array.flags.writeable
+    assert cache.info() == CacheInfo(
+        hits=1,
+        misses=1,
+        evictions=0,
+        entries=1,
+        current_bytes=array.nbytes,
+        max_bytes=1024,
+    )
+
+
+def test_cache_lru_eviction():
+    cache = ArrayCache(max_bytes=200)
+    cache.put("a", np.zeros(10))
+    cache.put("b", np.zeros(10))
+    cache.get("a")
+    cache.put("c", np.zeros(10))
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.info().evictions == 1
+    assert cache.info().current_bytes == 160
+
+
+def test_cache_skips_arrays_over_budget():
+    cache = ArrayCache(max_bytes=100)
+    cache.put("a", np.zeros(10))
+    cache.put("b", np.zeros(100))
+    assert "a" in cache
+    assert "b" not in cache
+
+
+def test_cache_shrink_budget():
+    cache = ArrayCache(max_bytes=200)
+    cache.put("a", np.zeros(10))
+    cache.put("b", np.zeros(10))
+    cache.max_bytes = 100
+    assert len(cache) == 1
+    assert "b" in cache
+    cache.max_bytes = 0
+    assert len(cache) == 0
+
+
+def test_cache_pop_and_clear():
+    cache = ArrayCache(max_bytes=200)
+    cache.put("a", np.zeros(10))
+    assert cache.pop("a") is not None
+    assert cache.info().current_bytes == 0
+    cache.put("a", np.zeros(10))
+    cache.clear()
+    assert cache.info() == CacheInfo(0, 0, 0, 0, 0, 200)
+
+
+def test_cache_invalid_budget():
+    with pytest.raises(InvalidInputError):
+        ArrayCache(max_bytes=-1)
+
+
+def test_disk_cache_round_trip():
+    with TemporaryDirectory() as tmpdir:
+        cache = DiskArrayCache(tmpdir, max_bytes=10_000)
+        arrays = {"u": np.arange(5, dtype=np.int32), "signals": np.ones((5, 3))}
+        assert cache.get("a") is None
+        cache.put("a", arrays)
+        loaded = cache.get("a")
+        assert loaded is not None
+        assert loaded.keys() == arrays.keys()
+        assert all(np.array_equal(loaded[k], arrays[k]) for k in arrays)
+        assert loaded["u"].dtype == np.int32
+        info = cache.info()
+        assert (info.hits, info.misses, info.entries) == (1, 1, 1)
+        assert info.current_bytes == Path(tmpdir, "a.npz").stat().st_size
+
+        # A new instance picks up the files left by the previous one
+        reopened = DiskArrayCache(tmpdir, max_bytes=10_000)
+        assert "a" in reopened
+        assert reopened.info().current_bytes == info.current_bytes
+
+
+def test_disk_cache_lru_eviction():
+    with TemporaryDirectory() as tmpdir:
+        cache = DiskArrayCache(tmpdir, max_bytes=10_000)
+        for key in ["a", "b", "c"]:
+            cache.put(key, {"x": np.zeros(100)})
+        entry_bytes = cache.info().current_bytes // 3
+        cache.get("a")
+        cache.max_bytes = 2 * entry_bytes
+        assert sorted(os.listdir(tmpdir)) == ["a.npz", "c.npz"]
+        assert cache.info().evictions == 1
+
+        # Use order is restored from modification times
+        stat = os.stat(Path(tmpdir, "c.npz"))
+        os.utime(Path(tmpdir, "c.npz"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        reopened = DiskArrayCache(tmpdir, max_bytes=2 * entry_bytes)
+        reopened.put("d", {"x": np.zeros(100)})
+        assert sorted(os.listdir(tmpdir)) == ["c.npz", "d.npz"]
+
+
+def test_disk_cache_skips_entries_over_budget():
+    with TemporaryDirectory() as tmpdir:
+        cache = DiskArrayCache(tmpdir, max_bytes=1000)
+        cache.put("a", {"x": np.zeros(10)})
+        cache.put("b", {"x": np.zeros(1000)})
+        assert "a" in cache
+        assert "b" not in cache
+        assert sorted(os.listdir(tmpdir)) == ["a.npz"]
+
+
+def test_disk_cache_pop_clear_and_missing_files():
+    with TemporaryDirectory() as tmpdir:
+        cache = DiskArrayCache(tmpdir, max_bytes=10_000)
+        cache.put("a", {"x": np.zeros(10)})
+        assert np.array_equal(cache.pop("a")["x"], np.zeros(10))
+        assert cache.info().current_bytes == 0
+        cache.put("a", {"x": np.zeros(10)})
+        os.remove(Path(tmpdir, "a.npz"))
+        assert cache.get("a") is None
+        assert "a" not in cache
+        cache.put("b", {"x": np.zeros(10)})
+        cache.clear()
+        assert os.listdir(tmpdir) == []
+        assert cache.info() == CacheInfo(0, 0, 0, 0, 0, 10_000)
+
+
+def test_disk_cache_invalid_input():
+    with TemporaryDirectory() as tmpdir:
+        with pytest.raises(InvalidInputError):
+            DiskArrayCache(tmpdir, max_bytes=-1)
+        cache = DiskArrayCache(tmpdir)
+        with pytest.raises(InvalidInputError):
+            cache.put("../a", {"x": np.zeros(1)})
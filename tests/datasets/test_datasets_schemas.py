@@ -1,3 +1,6 @@
+from tempfile import TemporaryDirectory
+
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -162,6 +165,131 @@ def test_tabular_dataset_data_to_dict():
     assert to_dict_data["target"]["encoding"] == data["target"]["encoding"]
 
 
+def test_tabular_dataset_data_categorical_metadata_round_trip():
+    metadata = pd.DataFrame(
+        {
+            "image_idx": np.array([0, 0, 1], dtype=np.int32),
+            "camera_id": pd.Categorical(["cam_a", "cam_a", "cam_b"]),
+            "shape_label": pd.Categorical(["a", None, "a"]),
+        }
+    )
+    tabular_dataset_data = TabularDatasetData(
+        pixels=pd.DataFrame({"u": [0, 1, 2], "v": [0, 0, 0]}),
+        signals=pd.DataFrame({0: [1.0, 2.0, 3.0]}),
+        metadata=metadata,
+    )
+    to_dict_data = tabular_dataset_data.to_dict()
+    assert to_dict_data["metadata"]["camera_id"] == {0: 0, 1: 0, 2: 1}
+    assert to_dict_data["metadata_categories"] == {
+        "camera_id": ["cam_a", "cam_b"],
+        "shape_label": ["a"],
+    }
+    restored = TabularDatasetData.from_dict(to_dict_data)
+    pd.testing.assert_frame_equal(restored.metadata, metadata)
+
+    sliced_data = restored[1:].reset_index()
+    assert sliced_data.metadata.dtypes.equals(metadata.dtypes)
+    assert sliced_data.metadata["camera_id"].cat.categories.to_list() == [
+        "cam_a",
+        "cam_b",
+    ]
+
+
+def _tabular_dataset_data(target) -> TabularDatasetData:
+    rng = np.random.default_rng(0)
+    return TabularDatasetData(
+        pixels=pd.DataFrame(
+            {"u": np.arange(4, dtype=np.int32), "v": np.arange(4, dtype=np.int32)}
+        ),
+        signals=pd.DataFrame(rng.random((4, 3)).astype(np.float32), columns=[0, 1, 2]),
+        metadata=pd.DataFrame(
+            {
+                "image_idx": np.array([0, 0, 1, 1], dtype=np.int32),
+                "camera_id": pd.Categorical(["cam_a", "cam_a", "cam_b", "cam_b"]),
+                "note": ["x", "y", "x", "z"],
+            }
+        ),
+        target=target,
+    )
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_tabular_dataset_data_save_load(mmap):
+    data = _tabular_dataset_data(
+        ClassificationTarget.from_iterable(["a", "b", "a", "b"])
+    )[1:]
+    with TemporaryDirectory() as tmpdir:
+        data.save(tmpdir)
+        loaded = TabularDatasetData.load(tmpdir, mmap=mmap)
+        pd.testing.assert_frame_equal(loaded.pixels, data.pixels)
+        pd.testing.assert_frame_equal(loaded.signals, data.signals)
+        pd.testing.assert_frame_equal(loaded.metadata, data.metadata)
+        pd.testing.assert_series_equal(loaded.target.label, data.target.label)
+        pd.testing.assert_series_equal(loaded.target.value, data.target.value)
+        pd.testing.assert_series_equal(loaded.target.encoding, data.target.encoding)
+        # Memory-mapped arrays are copy-on-write, edits never reach the files
+        loaded.signals.iloc[0, 0] = 5
+        assert loaded.signals.iloc[0, 0] == 5
+        reloaded = TabularDatasetData.load(tmpdir, mmap=mmap)
+        pd.testing.assert_frame_equal(reloaded.signals, data.signals)
+        del loaded, reloaded
+
+
+def test_tabular_dataset_data_save_overwrite(tmp_path, monkeypatch):
+    first = _tabular_dataset_data(None)
+    second = _tabular_dataset_data(None)[1:]
+    second.signals = second.signals + 1
+    first.save(tmp_path)
+    loaded = TabularDatasetData.load(tmp_path)
+
+    second.save(tmp_path)
+    # Arrays mapped from the first save are untouched by the second one
+    pd.testing.assert_frame_equal(loaded.signals, first.signals)
+    pd.testing.assert_frame_equal(
+        TabularDatasetData.load(tmp_path).signals, second.signals
+    )
+    files = sorted(path.name for path in tmp_path.iterdir())
+
+    # Interrupted or failing saves keep the previous dataset and its files
+    def interrupted_save_target(target, directory, stem):
+        raise RuntimeError("interrupted")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("siapy.datasets.schemas._save_target", interrupted_save_target)
+        with pytest.raises(RuntimeError):
+            first.save(tmp_path)
+    unserializable = TabularDatasetData(
+        pixels=first.pixels,
+        signals=first.signals,
+        metadata=first.metadata.assign(
+            acquired=pd.to_datetime(["2024-01-01", "2024-01-02"] * 2)
+        ),
+    )
+    with pytest.raises(TypeError):
+        unserializable.save(tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == files
+    pd.testing.assert_frame_equal(
+        TabularDatasetData.load(tmp_path).signals, second.signals
+    )
+    del loaded
+
+
+def test_tabular_dataset_data_save_load_regression_target():
+    data = _tabular_dataset_data(
+        RegressionTarget(value=pd.Series([0.5, 1.0, 1.5, 2.0]), name="ripeness")
+    )
+    with TemporaryDirectory() as tmpdir:
+        data.save(tmpdir)
+        loaded = TabularDatasetData.load(tmpdir, mmap=False)
+    assert loaded.target.name == "ripeness"
+    pd.testing.assert_series_equal(loaded.target.value, data.target.value)
+
+    data.target = None
+    with TemporaryDirectory() as tmpdir:
+        data.save(tmpdir)
+        assert TabularDatasetData.load(tmpdir, mmap=False).target is None
+
+
 def test_tabular_dataset_data_to_dataframe():
     data = {
         "pixels": {"0": [255, 255], "1": [0, 0]},
@@ -1,6 +1,15 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from siapy.core.cache import DiskArrayCache
+from siapy.core.exceptions import InvalidInputError
 from siapy.datasets.schemas import TabularDatasetData
-from siapy.datasets.tabular import TabularDataEntity
-from siapy.entities import SpectralImageSet
+from siapy.datasets import tabular
+from siapy.datasets.tabular import TabularDataEntity, TabularDataset
+from siapy.entities import Pixels, Shape, Signatures, SpectralImage, SpectralImageSet
 
 
 def test_tabular_len(spectral_tabular_dataset):
@@ -49,3 +58,302 @@ def test_tabular_generate_dataset(spectral_tabular_dataset):
     assert not data.signals.empty
     assert not data.metadata.empty
     assert data.target is None
+
+
+def test_tabular_save_signatures_to_parquet(tmp_path, save_envi_image):
+    image = np.random.default_rng(0).random((6, 6, 3)).astype(np.float32)
+    metadata = {"description": "ID = cam_a"}
+    header_path = save_envi_image("image", image, metadata=metadata)
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    for label, corners in [("leaf", [(0, 0), (1, 1)]), ("soil", [(3, 3), (5, 4)])]:
+        spectral_image.geometric_shapes.append(
+            Shape.from_shape_type(
+                "rectangle", Pixels.from_iterable(corners), label=label
+            )
+        )
+    dataset = TabularDataset(spectral_image)
+    dataset.process_image_data()
+
+    root = tmp_path / "archive"
+    dataset.save_signatures_to_parquet(root)
+    assert os.listdir(root) == ["camera_id=cam_a"]
+    soil = Signatures.load_from_parquet(root, filters=[("shape_label", "=", "soil")])
+    assert len(soil.pixels) == 6
+    pixels_v, pixels_u = soil.pixels.v_array(), soil.pixels.u_array()
+    assert np.all((pixels_u >= 3) & (pixels_v >= 3))
+    assert np.allclose(soil.signals.to_numpy(), image[pixels_v, pixels_u])
+
+    dataset.save_signatures_to_parquet(root)
+    assert len(Signatures.load_from_parquet(root).pixels) == 10
+    by_camera = tmp_path / "by_camera"
+    for _ in range(2):
+        dataset.save_signatures_to_parquet(by_camera, partition_by=["camera_id"])
+    assert len(Signatures.load_from_parquet(by_camera).pixels) == 10
+    dataset.save_signatures_to_parquet(
+        by_camera, partition_by=["camera_id"], append=True
+    )
+    assert len(Signatures.load_from_parquet(by_camera).pixels) == 20
+
+    with pytest.raises(InvalidInputError):
+        dataset.save_signatures_to_parquet(root, partition_by=["band"])
+
+
+def test_tabular_process_image_data_single_pass(save_envi_image):
+    image = np.random.default_rng(1).random((8, 8, 2)).astype(np.float32)
+    header_path = save_envi_image("image", image, metadata={"description": "ID = cam"})
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    shapes = [
+        Shape.from_shape_type("rectangle", Pixels.from_iterable([(0, 0), (3, 2)])),
+        Shape.from_shape_type(
+            "freedraw", Pixels.from_iterable([(1, 1), (7, 3), (4, 7)])
+        ),
+        Shape.from_shape_type("point", Pixels.from_iterable([(6, 6)])),
+    ]
+    spectral_image.geometric_shapes.extend(shapes)
+    dataset = TabularDataset(spectral_image)
+    dataset.process_image_data()
+
+    assert [entity.shape_idx for entity in dataset] == [0, 1, 2]
+    for entity, shape in zip(dataset, shapes):
+        expected = spectral_image.to_signatures(shape.convex_hull())
+        assert entity.shape_type == shape.shape_type
+        assert entity.signatures.pixels == expected.pixels
+        assert entity.signatures.signals == expected.signals
+
+
+def _images_with_shapes(save_envi_image, count: int) -> list[SpectralImage]:
+    rng = np.random.default_rng(2)
+    images = []
+    for idx in range(count):
+        header_path = save_envi_image(
+            f"image_{idx}",
+            rng.random((8, 8, 2)).astype(np.float32),
+            metadata={"description": f"ID = cam_{idx}"},
+        )
+        image = SpectralImage.envi_open(header_path=header_path)
+        image.geometric_shapes.extend(
+            [
+                Shape.from_shape_type(
+                    "rectangle", Pixels.from_iterable([(idx, 0), (idx + 2, 3)])
+                ),
+                Shape.from_shape_type(
+                    "freedraw",
+                    Pixels.from_iterable([(0, 1), (7, idx), (3, 7)]),
+                    label="lasso",
+                ),
+            ]
+        )
+        images.append(image)
+    return images
+
+
+def test_tabular_process_image_data_n_jobs(save_envi_image, monkeypatch):
+    # Use worker processes even on machines with a single CPU
+    monkeypatch.setattr("siapy.datasets.tabular.get_number_cpus", lambda n: n)
+    image_set = SpectralImageSet(_images_with_shapes(save_envi_image, 3))
+    sequential = TabularDataset(image_set)
+    sequential.process_image_data()
+    parallel = TabularDataset(image_set)
+    parallel.process_image_data(n_jobs=2)
+
+    assert len(parallel) == len(sequential) == 6
+    for entity, expected in zip(parallel, sequential):
+        assert (entity.image_idx, entity.shape_idx) == (
+            expected.image_idx,
+            expected.shape_idx,
+        )
+        assert entity.camera_id == expected.camera_id
+        assert entity.shape_label == expected.shape_label
+        assert entity.signatures.pixels == expected.signatures.pixels
+        assert entity.signatures.signals == expected.signatures.signals
+
+
+def test_tabular_process_image_data_n_jobs_requires_header(
+    save_envi_image, monkeypatch
+):
+    monkeypatch.setattr("siapy.datasets.tabular.get_number_cpus", lambda n: n)
+    image = _images_with_shapes(save_envi_image, 1)[0]
+    dataset = TabularDataset(SpectralImage(image.file, image.geometric_shapes.shapes))
+    with pytest.raises(InvalidInputError):
+        dataset.process_image_data(n_jobs=2)
+
+
+def test_tabular_process_image_data_incremental(save_envi_image, monkeypatch):
+    calls = []
+    to_signatures_many = SpectralImage.to_signatures_many
+
+    def counting_to_signatures_many(self, pixels_list, **kwargs):
+        calls.append((self.filepath.name, len(pixels_list)))
+        return to_signatures_many(self, pixels_list, **kwargs)
+
+    monkeypatch.setattr(
+        SpectralImage, "to_signatures_many", counting_to_signatures_many
+    )
+    images = _images_with_shapes(save_envi_image, 2)
+    dataset = TabularDataset(SpectralImageSet(images))
+    dataset.process_image_data()
+    assert calls == [("image_0.img", 2), ("image_1.img", 2)]
+    signatures = [entity.signatures for entity in dataset]
+
+    # Nothing changed: no image is read again
+    calls.clear()
+    dataset.process_image_data()
+    assert calls == []
+    assert all(
+        entity.signatures is expected for entity, expected in zip(dataset, signatures)
+    )
+
+    # Only the new shape is extracted
+    images[1].geometric_shapes.append(
+        Shape.from_shape_type("point", Pixels.from_iterable([(5, 5)]))
+    )
+    dataset.process_image_data()
+    assert calls == [("image_1.img", 1)]
+    assert len(dataset) == 5
+    assert dataset[4].shape_idx == 2
+
+    # A rewritten image file invalidates all of its shapes
+    calls.clear()
+    stat = os.stat(images[0].filepath)
+    os.utime(images[0].filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    dataset.process_image_data()
+    assert calls == [("image_0.img", 2)]
+    assert dataset[2].signatures is signatures[2]
+
+
+def test_tabular_process_image_data_disk_cache(tmp_path, save_envi_image, monkeypatch):
+    calls = []
+    to_signatures_many = SpectralImage.to_signatures_many
+
+    def counting_to_signatures_many(self, pixels_list, **kwargs):
+        calls.append(len(pixels_list))
+        return to_signatures_many(self, pixels_list, **kwargs)
+
+    monkeypatch.setattr(
+        SpectralImage, "to_signatures_many", counting_to_signatures_many
+    )
+    image_set = SpectralImageSet(_images_with_shapes(save_envi_image, 2))
+    cache = DiskArrayCache(tmp_path / "cache")
+    cold = TabularDataset(image_set, cache=cache)
+    cold.process_image_data()
+    assert calls == [2, 2]
+    assert len(cache) == 4
+
+    # A new dataset, as in a later run, skips extraction entirely
+    calls.clear()
+    warm = TabularDataset(image_set, cache=DiskArrayCache(tmp_path / "cache"))
+    warm.process_image_data()
+    assert calls == []
+    for entity, expected in zip(warm, cold):
+        assert entity.signatures.pixels == expected.signatures.pixels
+        assert entity.signatures.signals == expected.signatures.signals
+        assert entity.signatures.signals.dtype == expected.signatures.signals.dtype
+
+
+def test_tabular_generate_dataset_data_reuses_blocks(save_envi_image, monkeypatch):
+    dataset = TabularDataset(SpectralImageSet(_images_with_shapes(save_envi_image, 2)))
+    dataset.process_image_data()
+    expected = dataset.generate_dataset_data()
+
+    calls = []
+    signatures_block = tabular._signatures_block
+
+    def counting_signatures_block(signatures, mean):
+        calls.append(mean)
+        return signatures_block(signatures, mean)
+
+    monkeypatch.setattr(tabular, "_signatures_block", counting_signatures_block)
+    data = dataset.generate_dataset_data()
+    assert calls == []
+    pd.testing.assert_frame_equal(data.signals, expected.signals)
+
+    dataset.generate_dataset_data(mean_signatures=False)
+    dataset.generate_dataset_data(mean_signatures=False)
+    assert calls == [False] * len(dataset)
+
+
+def test_tabular_repeat_metadata_by_field_name():
+    counts = np.array([2, 1])
+    image_idx = tabular._repeat_metadata("image_idx", [0, 1], counts)
+    assert image_idx.dtype == np.int32
+    assert image_idx.tolist() == [0, 0, 1]
+    camera_id = tabular._repeat_metadata("camera_id", [1, 2], counts)
+    assert isinstance(camera_id, pd.Categorical)
+    assert camera_id.tolist() == [1, 1, 2]
+    empty = tabular._repeat_metadata("shape_label", [], np.array([], dtype=int))
+    assert isinstance(empty, pd.Categorical)
+
+
+def _reference_dataset_data(dataset: TabularDataset, mean_signatures: bool):
+    # Per-entity pandas assembly the vectorized implementation must reproduce
+    pixels_dfs, signals_dfs, metadata_dfs = [], [], []
+    for entity in dataset:
+        signatures_df = entity.signatures.to_dataframe().dropna()
+        if mean_signatures:
+            signatures_df = signatures_df.mean().to_frame().T
+        n = len(signatures_df)
+        metadata_dfs.append(
+            pd.DataFrame(
+                {
+                    "image_idx": [entity.image_idx] * n,
+                    "image_filepath": [str(entity.image_filepath)] * n,
+                    "camera_id": [entity.camera_id] * n,
+                    "shape_idx": [entity.shape_idx] * n,
+                    "shape_type": [entity.shape_type] * n,
+                    "shape_label": [entity.shape_label] * n,
+                }
+            )
+        )
+        signatures = Signatures.from_dataframe(signatures_df)
+        pixels_dfs.append(signatures.pixels.df)
+        signals_dfs.append(signatures.signals.df)
+    return (
+        pd.concat(pixels_dfs, ignore_index=True),
+        pd.concat(signals_dfs, ignore_index=True),
+        pd.concat(metadata_dfs, ignore_index=True),
+    )
+
+
+def test_tabular_generate_dataset_data_vectorized(save_envi_image):
+    rng = np.random.default_rng(3)
+    images = []
+    for idx, bands in enumerate([3, 3, 2]):
+        image = rng.random((6, 6, bands)).astype(np.float32)
+        image[1, 1:3] = np.nan
+        header_path = save_envi_image(
+            f"image_{idx}", image, metadata={"description": f"ID = cam_{bands}"}
+        )
+        spectral_image = SpectralImage.envi_open(header_path=header_path)
+        spectral_image.geometric_shapes.extend(
+            [
+                Shape.from_shape_type(
+                    "rectangle", Pixels.from_iterable([(0, 0), (3, 2)]), label="a"
+                ),
+                Shape.from_shape_type("point", Pixels.from_iterable([(2, 1)])),
+            ]
+        )
+        images.append(spectral_image)
+    dataset = TabularDataset(SpectralImageSet(images))
+    dataset.process_image_data()
+
+    for mean_signatures in [False, True]:
+        data = dataset.generate_dataset_data(mean_signatures=mean_signatures)
+        pixels, signals, metadata = _reference_dataset_data(dataset, mean_signatures)
+        assert np.array_equal(
+            data.pixels.to_numpy(), pixels.to_numpy(), equal_nan=mean_signatures
+        )
+        assert data.signals.columns.tolist() == signals.columns.tolist()
+        assert np.allclose(data.signals.to_numpy(), signals.to_numpy(), equal_nan=True)
+        assert data.metadata.dtypes["image_idx"] == np.int32
+        assert data.metadata.dtypes["shape_idx"] == np.int32
+        assert all(
+            isinstance(data.metadata.dtypes[name], pd.CategoricalDtype)
+            for name in ["image_filepath", "camera_id", "shape_type", "shape_label"]
+        )
+        assert data.metadata.astype(object).equals(metadata.astype(object))
+
+        # Dtypes survive slicing, index resets and dict round trips
+        subset = data[1:].reset_index()
+        assert subset.metadata.dtypes.equals(data.metadata.dtypes)
+        restored = TabularDatasetData.from_dict(subset.to_dict())
+        pd.testing.assert_frame_equal(restored.metadata, subset.metadata)
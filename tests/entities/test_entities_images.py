@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 import numpy as np
@@ -6,10 +7,22 @@ import spectral as sp
 from PIL import Image
 
 from siapy.core.exceptions import InvalidFilepathError, InvalidInputError
-from siapy.entities import Pixels, Shape, SpectralImage
-from siapy.entities.images import GeometricShapes, _parse_description
+from siapy.entities import Pixels, Shape, Signatures, SpectralImage
+from siapy.entities.images import (
+    GeometricShapes,
+    WavelengthRange,
+    _coalesce_row_runs,
+    _parse_description,
+)
+from siapy.entities.pixels import PixelsBox, SpanPixels
+from siapy.entities.shapes import FreeDraw, Rectangle
 from siapy.utils.plots import pixels_select_lasso
 
+INTERLEAVES = ["bil", "bip", "bsq"]
+INTERLEAVES_MEMMAP = [
+    (interleave, memmap) for interleave in INTERLEAVES for memmap in [False, True]
+]
+
 
 def test_envi_open(configs):
     spectral_image_vnir = SpectralImage.envi_open(
@@ -114,11 +127,11 @@ def test_filename(spectral_images, configs):
 def test_wavelengths(spectral_images):
     vnir_wave = spectral_images.vnir.wavelengths
     swir_wave = spectral_images.swir.wavelengths
-    assert isinstance(vnir_wave, list)
-    assert all(isinstance(w, float) for w in vnir_wave)
+    assert isinstance(vnir_wave, np.ndarray)
+    assert vnir_wave.dtype == np.float64
     assert len(vnir_wave) == 160
-    assert isinstance(swir_wave, list)
-    assert all(isinstance(w, float) for w in swir_wave)
+    assert isinstance(swir_wave, np.ndarray)
+    assert swir_wave.dtype == np.float64
     assert len(swir_wave) == 288
 
 
@@ -139,6 +152,42 @@ def test_camera_id(spectral_images, configs):
     assert swir_cam_id == configs.image_swir_name
 
 
+def test_parsed_metadata_cached(save_envi_image):
+    image = np.zeros((2, 2, 3), dtype=np.float32)
+    metadata = {
+        "wavelength": [400.0, 500.0, 600.0],
+        "default bands": [2, 1, 0],
+        "description": "ID = cam_a\nBinning = 2",
+    }
+    header_path = save_envi_image("image", image, metadata=metadata)
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+
+    wavelengths = spectral_image.wavelengths
+    assert np.array_equal(wavelengths, [400.0, 500.0, 600.0])
+    assert wavelengths.dtype == np.float64
+    assert not wavelengths.flags.writeable
+    assert spectral_image.wavelengths is wavelengths
+    assert spectral_image.default_bands == [2, 1, 0]
+    assert spectral_image.description == {"ID": "cam_a", "Binning": 2}
+    assert spectral_image.camera_id == "cam_a"
+
+    # returned containers are copies, mutating them keeps the cache intact
+    spectral_image.default_bands.append(5)
+    spectral_image.description["ID"] = "changed"
+    assert spectral_image.default_bands == [2, 1, 0]
+    assert spectral_image.camera_id == "cam_a"
+
+    new_metadata = dict(spectral_image.metadata)
+    new_metadata["description"] = "ID = cam_b"
+    new_metadata["wavelength"] = ["1000", "1100", "1200"]
+    spectral_image.metadata = new_metadata
+    assert spectral_image.camera_id == "cam_b"
+    assert np.array_equal(spectral_image.wavelengths, [1000.0, 1100.0, 1200.0])
+
+    spectral_image.file.metadata = dict(metadata, description="ID = cam_c")
+    assert spectral_image.camera_id == "cam_c"
+
+
 def test_to_numpy(spectral_images):
     spectral_image_vnir = spectral_images.vnir.to_numpy()
     spectral_image_swir = spectral_images.swir.to_numpy()
@@ -146,6 +195,163 @@ def test_to_numpy(spectral_images):
     assert isinstance(spectral_image_swir, np.ndarray)
 
 
+@pytest.mark.parametrize("interleave", INTERLEAVES)
+def test_memmap_to_numpy(save_envi_image, interleave):
+    image = np.random.default_rng(0).random((6, 5, 4)).astype(np.float32)
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=True)
+    assert spectral_image.memmap
+    assert spectral_image.header_path == header_path
+    assert SpectralImage(spectral_image.file).header_path is None
+    image_mmap = spectral_image.to_numpy()
+    assert isinstance(image_mmap, np.memmap)
+    assert image_mmap.shape == spectral_image.shape
+    assert not image_mmap.flags.writeable
+    assert np.array_equal(image_mmap, image)
+
+
+@pytest.mark.parametrize("interleave", INTERLEAVES)
+def test_memmap_matches_regular_reads(save_envi_image, interleave):
+    image = np.random.default_rng(0).random((6, 5, 4)).astype(np.float32)
+    image[1, 2, :] = np.nan
+    pixels = Pixels.from_iterable([(1, 2), (3, 4), (2, 4)])
+    header_path = save_envi_image("image", image, interleave=interleave)
+    regular = SpectralImage.envi_open(header_path=header_path)
+    mmap = SpectralImage.envi_open(header_path=header_path, memmap=True)
+    assert np.array_equal(
+        mmap.to_signatures(pixels).signals.to_numpy(),
+        regular.to_signatures(pixels).signals.to_numpy(),
+    )
+    assert np.array_equal(
+        mmap.to_subarray(pixels), regular.to_subarray(pixels), equal_nan=True
+    )
+    assert np.allclose(mmap.mean(axis=(0, 1)), regular.mean(axis=(0, 1)))
+    assert np.array_equal(mmap.to_numpy(nan_value=0), regular.to_numpy(nan_value=0))
+    # replacing nan values must not touch the mapped file
+    assert np.isnan(mmap.to_numpy()[1, 2, :]).all()
+
+
+def test_cube_cache_shared_across_instances(save_envi_image):
+    image = np.random.default_rng(0).random((6, 5, 4)).astype(np.float32)
+    pixels = Pixels.from_iterable([(1, 2), (3, 4)])
+    SpectralImage.cube_cache.max_bytes = 10 * image.nbytes
+    try:
+        header_path = save_envi_image("image", image, interleave="bil")
+        first = SpectralImage.envi_open(header_path=header_path)
+        second = SpectralImage.envi_open(header_path=header_path)
+
+        signatures = first.to_signatures(pixels)
+        first.to_subarray(pixels)
+        second.mean()
+        info = SpectralImage.cube_cache.info()
+        assert info.misses == 1
+        assert info.hits == 2
+        assert info.entries == 1
+
+        cached = second.to_numpy()
+        assert not cached.flags.writeable
+        assert np.array_equal(cached, image)
+        assert second.to_numpy(nan_value=0).flags.writeable
+        assert np.array_equal(signatures.signals.to_numpy(), image[[2, 4], [1, 3], :])
+
+        # rewriting the file changes its mtime and invalidates the entry
+        os.utime(first.filepath, ns=(0, 0))
+        first.to_numpy()
+        assert SpectralImage.cube_cache.info().misses == 2
+    finally:
+        SpectralImage.cube_cache.max_bytes = 0
+        SpectralImage.cube_cache.clear()
+
+
+def test_cube_cache_skips_cubes_over_budget(save_envi_image, monkeypatch):
+    image = np.random.default_rng(0).random((6, 5, 4)).astype(np.float32)
+    pixels = Pixels.from_iterable([(1, 2), (3, 4)])
+    spectral_image = SpectralImage.envi_open(
+        header_path=save_envi_image("image", image, interleave="bil")
+    )
+    full_reads = []
+    getitem = type(spectral_image.file).__getitem__
+
+    def counting_getitem(self, key):
+        full_reads.append(key)
+        return getitem(self, key)
+
+    monkeypatch.setattr(type(spectral_image.file), "__getitem__", counting_getitem)
+    SpectralImage.cube_cache.max_bytes = image.nbytes - 1
+    try:
+        for _ in range(3):
+            signatures = spectral_image.to_signatures(pixels)
+            spectral_image.to_subarray(pixels)
+            spectral_image.mean()
+        assert full_reads == []
+        assert SpectralImage.cube_cache.info().entries == 0
+        assert np.array_equal(signatures.signals.to_numpy(), image[[2, 4], [1, 3], :])
+    finally:
+        SpectralImage.cube_cache.max_bytes = 0
+        SpectralImage.cube_cache.clear()
+
+
+@pytest.mark.parametrize(("interleave", "memmap"), INTERLEAVES_MEMMAP)
+def test_bands_selection(save_envi_image, interleave, memmap):
+    image = np.random.default_rng(0).random((6, 5, 4)).astype(np.float32)
+    metadata = {"wavelength": [400.0, 500.0, 600.0, 700.0]}
+    pixels = Pixels.from_iterable([(1, 2), (3, 4), (2, 4)])
+    bands = [3, 1]
+    header_path = save_envi_image(
+        "image", image, metadata=metadata, interleave=interleave
+    )
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=memmap)
+    assert np.array_equal(spectral_image.to_numpy(bands=bands), image[:, :, bands])
+    signatures = spectral_image.to_signatures(pixels, bands=bands)
+    assert signatures.signals.df.columns.tolist() == bands
+    assert np.array_equal(
+        signatures.signals.to_numpy(), image[[2, 4, 4], [1, 3, 2]][:, bands]
+    )
+    subarray = spectral_image.to_subarray(pixels, bands=bands)
+    assert np.array_equal(
+        subarray,
+        spectral_image.to_subarray(pixels)[:, :, bands],
+        equal_nan=True,
+    )
+
+
+def test_resolve_bands(save_envi_image):
+    image = np.zeros((2, 2, 4), dtype=np.float32)
+    metadata = {"wavelength": [400.0, 500.0, 600.0, 700.0]}
+    header_path = save_envi_image("image", image, metadata=metadata)
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    assert spectral_image.resolve_bands(None) is None
+    assert spectral_image.resolve_bands([2, 0]) == [2, 0]
+    assert spectral_image.resolve_bands(WavelengthRange(450, 700)) == [1, 2, 3]
+    with pytest.raises(InvalidInputError):
+        spectral_image.resolve_bands(WavelengthRange(800, 900))
+    with pytest.raises(InvalidInputError):
+        spectral_image.resolve_bands([4])
+
+
+def test_to_signatures_dtype_and_band_labels(save_envi_image):
+    image = np.random.default_rng(0).random((3, 4, 4))
+    metadata = {"wavelength": [400.0, 500.0, 600.0, 700.0]}
+    pixels = Pixels.from_iterable([(0, 0), (3, 2), (1, 1)])
+    header_path = save_envi_image("image", image, metadata=metadata)
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+
+    signatures = spectral_image.to_signatures(
+        pixels, bands=[1, 3], dtype=np.float32, band_labels="wavelengths"
+    )
+    signals = signatures.signals.to_numpy()
+    assert signals.dtype == np.float32
+    assert signals.flags.c_contiguous
+    assert signatures.signals.columns.tolist() == [500.0, 700.0]
+    assert np.allclose(signals, image[[0, 2, 1], [0, 3, 1]][:, [1, 3]])
+
+    signatures = spectral_image.to_signatures(pixels, band_labels="wavelengths")
+    assert signatures.signals.df.columns.tolist() == metadata["wavelength"]
+    assert signatures.signals.dtype == np.float64
+    with pytest.raises(InvalidInputError):
+        spectral_image.to_signatures(pixels, band_labels="names")
+
+
 def test_remove_nan(spectral_images):
     image = np.array([[[1, 2, np.nan], [4, 2, 6]], [[np.nan, 8, 9], [10, 11, 12]]])
     result = spectral_images.vnir._remove_nan(image.copy())
@@ -187,6 +393,41 @@ def test_to_signatures(spectral_images):
     assert np.array_equal(signatures.pixels.df.iloc[2].to_numpy(), iterable[2])
 
 
+@pytest.mark.parametrize("interleave", INTERLEAVES)
+def test_to_signatures_sparse_gather(save_envi_image, interleave):
+    image = np.random.default_rng(0).random((20, 7, 4)).astype(np.float32)
+    rng = np.random.default_rng(1)
+    iterable = list(zip(rng.integers(0, 7, 50), rng.integers(0, 20, 50)))
+    pixels = Pixels.from_iterable(iterable)
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    signatures = spectral_image.to_signatures(pixels)
+    expected = Signatures.from_array_and_pixels(image, pixels)
+    assert signatures.signals.df.equals(expected.signals.df)
+    assert signatures.pixels is pixels
+
+
+def test_to_signatures_empty_pixels(save_envi_image):
+    image = np.zeros((3, 3, 2), dtype=np.float32)
+    header_path = save_envi_image("image", image, interleave="bip")
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    signatures = spectral_image.to_signatures(Pixels.from_iterable([]))
+    assert signatures.signals.to_numpy().shape == (0, 2)
+
+
+def test_coalesce_row_runs():
+    v_sorted = np.array([0, 0, 1, 2, 5, 6, 6, 9, 10, 11])
+    assert list(_coalesce_row_runs(v_sorted, 100)) == [(0, 4), (4, 7), (7, 10)]
+    assert list(_coalesce_row_runs(v_sorted, 2)) == [
+        (0, 3),
+        (3, 4),
+        (4, 7),
+        (7, 9),
+        (9, 10),
+    ]
+    assert list(_coalesce_row_runs(np.array([]), 2)) == []
+
+
 @pytest.mark.manual
 def test_to_signatures_perf(spectral_images):
     spectral_image_vnir = spectral_images.vnir
@@ -210,6 +451,114 @@ def test_to_subarray(spectral_images):
     assert np.array_equal(subarray, expected_subarray, equal_nan=True)
 
 
+@pytest.mark.parametrize(("interleave", "memmap"), INTERLEAVES_MEMMAP)
+def test_to_subarray_windowed(save_envi_image, interleave, memmap):
+    image = np.random.default_rng(0).random((8, 7, 3)).astype(np.float32)
+    pixels = Pixels.from_iterable([(2, 3), (4, 5), (3, 5), (6, 3)])
+    expected = np.full((3, 5, 3), np.nan)
+    for u, v in [(2, 3), (4, 5), (3, 5), (6, 3)]:
+        expected[v - 3, u - 2] = image[v, u]
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=memmap)
+    subarray = spectral_image.to_subarray(pixels)
+    assert subarray.dtype == np.float64
+    assert np.array_equal(subarray, expected, equal_nan=True)
+
+
+def test_to_subarray_out_buffer(save_envi_image):
+    image = np.random.default_rng(0).random((8, 7, 3)).astype(np.float32)
+    pixels = Pixels.from_iterable([(2, 3), (4, 5)])
+    header_path = save_envi_image("image", image, interleave="bil")
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    out = np.zeros((3, 3, 3), dtype=np.float32)
+    subarray = spectral_image.to_subarray(pixels, out=out)
+    assert subarray is out
+    assert np.array_equal(out[0, 0], image[3, 2])
+    assert np.array_equal(out[2, 2], image[5, 4])
+    assert np.isnan(out[1, 1]).all()
+
+    out = np.zeros((3, 3, 2), dtype=np.float32)
+    spectral_image.to_subarray(pixels, bands=[2, 0], out=out)
+    assert np.array_equal(out[2, 2], image[5, 4, [2, 0]])
+
+    with pytest.raises(InvalidInputError):
+        spectral_image.to_subarray(pixels, out=np.zeros((2, 3, 3)))
+    with pytest.raises(InvalidInputError):
+        spectral_image.to_subarray(pixels, out=np.zeros((3, 3, 3), dtype=int))
+
+
+@pytest.mark.parametrize(("interleave", "memmap"), INTERLEAVES_MEMMAP)
+def test_pixels_box_reads(save_envi_image, interleave, memmap):
+    image = np.random.default_rng(0).random((8, 7, 3)).astype(np.float32)
+    box = PixelsBox(u_min=2, v_min=3, u_max=5, v_max=4)
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=memmap)
+    subarray = spectral_image.to_subarray(box, bands=[1])
+    assert np.array_equal(subarray, image[3:5, 2:6, [1]])
+
+    signatures = spectral_image.to_signatures(box)
+    expected = spectral_image.to_signatures(box.to_pixels())
+    assert signatures.pixels.df.equals(expected.pixels.df)
+    assert signatures.signals.df.equals(expected.signals.df)
+
+
+@pytest.mark.parametrize(("interleave", "memmap"), INTERLEAVES_MEMMAP)
+def test_span_pixels_reads(save_envi_image, interleave, memmap):
+    image = np.random.default_rng(0).random((9, 7, 3)).astype(np.float32)
+    pixels = SpanPixels([(1, 2, 4), (2, 0, 6), (2, 1, 1), (6, 3, 3), (7, 0, 2)])
+    explicit = Pixels(pixels.df.copy())
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=memmap)
+    signatures = spectral_image.to_signatures(SpanPixels(pixels.spans), bands=[0, 2])
+    expected = spectral_image.to_signatures(explicit, bands=[0, 2])
+    assert signatures.pixels.df.equals(expected.pixels.df)
+    assert signatures.signals.df.equals(expected.signals.df)
+
+    subarray = spectral_image.to_subarray(pixels)
+    expected_subarray = spectral_image.to_subarray(explicit)
+    assert np.array_equal(subarray, expected_subarray, equal_nan=True)
+
+
+@pytest.mark.parametrize(("interleave", "memmap"), INTERLEAVES_MEMMAP)
+def test_to_signatures_many(save_envi_image, interleave, memmap):
+    image = np.random.default_rng(0).random((12, 10, 3)).astype(np.float32)
+    pixels_list = [
+        Rectangle(Pixels.from_iterable([(1, 1), (4, 3)])).convex_hull(),
+        FreeDraw(Pixels.from_iterable([(2, 2), (8, 4), (5, 9)])).convex_hull(),
+        Pixels.from_iterable([(0, 11), (9, 0)]),
+        PixelsBox(u_min=3, v_min=5, u_max=6, v_max=6),
+    ]
+    header_path = save_envi_image("image", image, interleave=interleave)
+    spectral_image = SpectralImage.envi_open(header_path=header_path, memmap=memmap)
+    signatures_list = spectral_image.to_signatures_many(pixels_list, bands=[2, 0])
+    assert len(signatures_list) == len(pixels_list)
+    for signatures, pixels in zip(signatures_list, pixels_list):
+        expected = spectral_image.to_signatures(pixels, bands=[2, 0])
+        assert signatures.pixels == expected.pixels
+        assert signatures.signals == expected.signals
+    assert spectral_image.to_signatures_many([]) == []
+
+
+def test_to_signatures_many_single_read(save_envi_image):
+    image = np.random.default_rng(0).random((12, 10, 3)).astype(np.float32)
+    pixels_list = [
+        Rectangle(Pixels.from_iterable([(0, row), (9, row + 1)])).convex_hull()
+        for row in range(0, 10, 2)
+    ]
+    header_path = save_envi_image("image", image, interleave="bip")
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    read_subregion = spectral_image.file.read_subregion
+    calls = []
+
+    def counting_read_subregion(*args, **kwargs):
+        calls.append(args)
+        return read_subregion(*args, **kwargs)
+
+    spectral_image.file.read_subregion = counting_read_subregion
+    spectral_image.to_signatures_many(pixels_list)
+    assert len(calls) == 1
+
+
 def test_mean(spectral_images):
     spectral_image_vnir = spectral_images.vnir
 
@@ -243,6 +592,40 @@ def test_mean(spectral_images):
     )
 
 
+def test_mean_blockwise(save_envi_image):
+    image = np.random.default_rng(0).random((9, 5, 3)).astype(np.float32)
+    image[2, 3, :] = np.nan
+    image[4, :, 1] = np.nan
+    header_path = save_envi_image("image", image, interleave="bil")
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    for axis in [None, 0, 1, 2, (0, 1), (1, 2), (0, 2), -1]:
+        mean = spectral_image.mean(axis=axis)
+        expected = np.nanmean(image, axis=axis)
+        assert np.shape(mean) == np.shape(expected)
+        assert np.allclose(mean, expected, equal_nan=True)
+    with pytest.raises(InvalidInputError):
+        spectral_image.mean(axis=3)
+
+
+def test_stats(save_envi_image):
+    image = np.random.default_rng(0).random((9, 5, 3)).astype(np.float32)
+    image[2, 3, :] = np.nan
+    header_path = save_envi_image("image", image, interleave="bsq")
+    spectral_image = SpectralImage.envi_open(header_path=header_path)
+    stats = spectral_image.stats(
+        percentiles=[50], bins=4, bins_range=(0, 1), block_rows=2
+    )
+    assert np.allclose(stats.mean, np.nanmean(image, axis=(0, 1)))
+    assert np.allclose(stats.std, np.nanstd(image, axis=(0, 1)))
+    assert np.allclose(stats.min, np.nanmin(image, axis=(0, 1)))
+    assert np.allclose(stats.max, np.nanmax(image, axis=(0, 1)))
+    assert np.allclose(stats.percentiles[50], np.nanpercentile(image, 50, axis=(0, 1)))
+    assert stats.histogram.shape == (3, 4)
+    assert np.array_equal(stats.histogram.sum(axis=1), stats.count)
+    with pytest.raises(InvalidInputError):
+        spectral_image.stats(block_rows=0)
+
+
 def test_to_display(spectral_images):
     spectral_image_vnir = spectral_images.vnir
 
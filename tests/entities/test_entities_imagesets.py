@@ -1,9 +1,20 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 
-from siapy.core.exceptions import InvalidInputError
-from siapy.entities import SpectralImage, SpectralImageSet
+from siapy.core.exceptions import (
+    InvalidFilepathError,
+    InvalidInputError,
+    MethodNotImplementedError,
+    ProcessingError,
+)
+from siapy.entities import (
+    LazySpectralImageSet,
+    SpectralImage,
+    SpectralImageSet,
+    imagesets,
+)
 
 
 def test_from_paths_valid(configs):
@@ -132,3 +143,262 @@ def test_sort(configs):
     image_set = SpectralImageSet(unordered_set.copy())
     image_set.images.sort()
     assert image_set.images == ordered_set != unordered_set
+
+
+def test_from_paths_max_workers_preserves_order(save_envi_image):
+    header_paths = [
+        save_envi_image(f"image_{idx}", np.full((2, 3, 4), idx, dtype=np.float32))
+        for idx in range(8)
+    ]
+    image_set = SpectralImageSet.from_paths(header_paths=header_paths, max_workers=4)
+    assert len(image_set) == 8
+    for idx, image in enumerate(image_set):
+        assert image.filepath.name == f"image_{idx}.img"
+
+
+def test_from_paths_collects_errors(tmp_path, save_envi_image):
+    header_paths = [
+        save_envi_image(f"image_{idx}", np.full((2, 3, 4), idx, dtype=np.float32))
+        for idx in range(3)
+    ]
+    header_paths.insert(1, tmp_path / "missing_1.hdr")
+    header_paths.append(tmp_path / "missing_2.hdr")
+
+    with pytest.raises(ProcessingError) as exc_info:
+        SpectralImageSet.from_paths(header_paths=header_paths, max_workers=2)
+    assert "missing_1.hdr" in str(exc_info.value)
+    assert "missing_2.hdr" in str(exc_info.value)
+
+    image_set = SpectralImageSet.from_paths(
+        header_paths=header_paths, max_workers=2, skip_errors=True
+    )
+    assert [image.filepath.name for image in image_set] == [
+        "image_0.img",
+        "image_1.img",
+        "image_2.img",
+    ]
+
+
+def test_from_paths_invalid_max_workers():
+    with pytest.raises(InvalidInputError):
+        SpectralImageSet.from_paths(header_paths=[], max_workers=0)
+
+
+def test_lazy_image_set_opens_on_demand(save_envi_image):
+    header_paths = [
+        save_envi_image(f"image_{idx}", np.full((2, 3, 4), idx, dtype=np.float32))
+        for idx in range(3)
+    ]
+    image_set = LazySpectralImageSet.from_paths(header_paths=header_paths)
+    assert len(image_set) == 3
+    assert str(image_set) == "<LazySpectralImageSet object with 3 spectral images>"
+    assert not any(image_set.is_opened(idx) for idx in range(3))
+
+    image = image_set[1]
+    assert isinstance(image, SpectralImage)
+    assert image.filepath.name == "image_1.img"
+    assert image_set[1] is image
+    assert [image_set.is_opened(idx) for idx in range(3)] == [False, True, False]
+
+    assert [image.filepath.name for image in image_set[-2:]] == [
+        "image_1.img",
+        "image_2.img",
+    ]
+    assert len(list(image_set)) == 3
+    assert all(image_set.is_opened(idx) for idx in range(3))
+
+
+def test_lazy_image_set_camera_ids_from_headers(save_envi_image):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b", "cam_a"])
+    ]
+    image_set = LazySpectralImageSet(header_paths)
+    assert sorted(image_set.cameras_id) == ["cam_a", "cam_b"]
+    assert not any(image_set.is_opened(idx) for idx in range(3))
+
+    images = image_set.images_by_camera_id("cam_a")
+    assert [image.filepath.name for image in images] == [
+        "image_0.img",
+        "image_2.img",
+    ]
+    assert [image_set.is_opened(idx) for idx in range(3)] == [True, False, True]
+
+
+def test_lazy_image_set_sort(save_envi_image):
+    header_paths = [
+        save_envi_image(f"image_{idx}", np.full((2, 3, 4), idx, dtype=np.float32))
+        for idx in range(3)
+    ]
+    image_set = LazySpectralImageSet(header_paths)
+    image_set.sort(reverse=True)
+    assert not any(image_set.is_opened(idx) for idx in range(3))
+    assert [image.filepath.name for image in image_set] == [
+        "image_2.img",
+        "image_1.img",
+        "image_0.img",
+    ]
+
+
+def test_lazy_image_set_from_paths_rejects_loading_options():
+    with pytest.raises(InvalidInputError):
+        LazySpectralImageSet.from_paths(header_paths=[], max_workers=4)
+
+
+def test_lazy_image_set_missing_header():
+    image_set = LazySpectralImageSet([Path("missing.hdr")])
+    assert len(image_set) == 1
+    with pytest.raises(InvalidFilepathError):
+        image_set.header(0)
+    with pytest.raises(InvalidFilepathError):
+        image_set[0]
+
+
+def test_lazy_image_set_invalid_lengths():
+    with pytest.raises(InvalidInputError):
+        LazySpectralImageSet([Path("a.hdr")], [])
+
+
+def test_images_by_metadata(save_envi_image):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b", "cam_a"])
+    ]
+    image_set = SpectralImageSet.from_paths(header_paths=header_paths)
+    assert image_set.cameras_id == ["cam_a", "cam_b"]
+
+    images = image_set.images_by_metadata(camera_id="cam_a", shape=(2, 3, 4))
+    assert [image.filepath.name for image in images] == [
+        "image_0.img",
+        "image_2.img",
+    ]
+    assert image_set.images_by_metadata(camera_id="cam_a", shape=(1, 1, 1)) == []
+    assert image_set.images_by_metadata(camera_id="cam_c") == []
+    assert len(image_set.images_by_metadata()) == 3
+
+    groups = image_set.group_by("camera_id")
+    assert list(groups.keys()) == ["cam_a", "cam_b"]
+    assert [len(images) for images in groups.values()] == [2, 1]
+    assert list(image_set.group_by("shape").keys()) == [(2, 3, 4)]
+    with pytest.raises(InvalidInputError):
+        image_set.group_by("unknown")
+
+
+def test_metadata_index_invalidated_on_mutation(save_envi_image):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b", "cam_c"])
+    ]
+    image_set = SpectralImageSet.from_paths(header_paths=header_paths[:2])
+    assert image_set.cameras_id == ["cam_a", "cam_b"]
+
+    image_set.append(SpectralImage.envi_open(header_path=header_paths[2]))
+    assert image_set.cameras_id == ["cam_a", "cam_b", "cam_c"]
+
+    image_set.sort(key=lambda image: image.camera_id, reverse=True)
+    assert image_set.cameras_id == ["cam_c", "cam_b", "cam_a"]
+    assert image_set.images_by_camera_id("cam_a")[0] is image_set[2]
+
+
+def test_lazy_image_set_metadata_index(save_envi_image):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b"])
+    ]
+    image_set = LazySpectralImageSet(header_paths)
+    assert image_set.cameras_id == ["cam_a", "cam_b"]
+    assert not any(image_set.is_opened(idx) for idx in range(2))
+    assert list(image_set.group_by("shape").keys()) == [(2, 3, 4)]
+    with pytest.raises(MethodNotImplementedError):
+        image_set.append(image_set[0])
+
+
+def test_metadata_index_follows_direct_list_edits(save_envi_image):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b", "cam_c"])
+    ]
+    image_set = SpectralImageSet.from_paths(header_paths=header_paths[:2])
+    assert image_set.cameras_id == ["cam_a", "cam_b"]
+
+    image_set.images.sort(key=lambda image: image.camera_id, reverse=True)
+    assert image_set.cameras_id == ["cam_b", "cam_a"]
+    assert image_set.images_by_camera_id("cam_a") == [image_set[1]]
+
+    image_set.images[0] = SpectralImage.envi_open(header_path=header_paths[2])
+    assert image_set.cameras_id == ["cam_c", "cam_a"]
+    assert image_set.images_by_camera_id("cam_c") == [image_set[0]]
+    assert image_set.images_by_camera_id("cam_b") == []
+
+
+def test_metadata_index_reads_headers_once(save_envi_image, monkeypatch):
+    header_paths = [
+        save_envi_image(
+            f"image_{idx}",
+            np.full((2, 3, 4), idx, dtype=np.float32),
+            metadata={"description": f"ID = {camera_id}"},
+        )
+        for idx, camera_id in enumerate(["cam_a", "cam_b", "cam_c"])
+    ]
+    image_set = SpectralImageSet.from_paths(header_paths=header_paths[:2])
+    reads = []
+    header_index_values = imagesets._header_index_values
+
+    def counting_header_index_values(header):
+        reads.append(header)
+        return header_index_values(header)
+
+    monkeypatch.setattr(imagesets, "_header_index_values", counting_header_index_values)
+    for _ in range(3):
+        assert image_set.cameras_id == ["cam_a", "cam_b"]
+    assert len(reads) == 2
+
+    image_set.append(SpectralImage.envi_open(header_path=header_paths[2]))
+    assert image_set.cameras_id == ["cam_a", "cam_b", "cam_c"]
+    assert len(reads) == 3
+
+    del image_set.images[0]
+    assert image_set.cameras_id == ["cam_b", "cam_c"]
+    assert image_set.images_by_camera_id("cam_c") == [image_set[1]]
+
+
+def test_lazy_image_set_sort_ignores_opened_images(save_envi_image):
+    header_paths = [
+        save_envi_image(name, np.zeros((2, 3, 4), dtype=np.float32))
+        for name in ["b_image", "a_image", "c_image"]
+    ]
+    image_paths = [
+        Path(header_path).with_name(name)
+        for header_path, name in zip(header_paths, ["1.img", "3.img", "2.img"])
+    ]
+    for header_path, image_path in zip(header_paths, image_paths):
+        Path(header_path).with_suffix(".img").rename(image_path)
+
+    image_set = LazySpectralImageSet(header_paths, image_paths)
+    image_set.sort()
+    order = [path.name for path in image_set.header_paths]
+    assert order == ["a_image.hdr", "b_image.hdr", "c_image.hdr"]
+
+    image_set[0]
+    image_set.sort()
+    assert [path.name for path in image_set.header_paths] == order
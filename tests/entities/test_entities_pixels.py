@@ -4,8 +4,11 @@ from tempfile import TemporaryDirectory
 
 import numpy as np
 import pandas as pd
+import pytest
 
+from siapy.core.exceptions import InvalidInputError
 from siapy.entities import Pixels
+from siapy.entities.pixels import PixelsBox, SpanPixels
 
 iterable = [(1, 2), (3, 4), (5, 6)]
 iterable_homo = [(1, 2, 1), (3, 4, 1), (5, 6, 1)]
@@ -15,10 +18,70 @@ def test_from_iterable():
     pixels = Pixels.from_iterable(iterable)
     assert isinstance(pixels, Pixels)
     assert pixels.df.equals(
-        pd.DataFrame(iterable, columns=[Pixels.coords.U, Pixels.coords.V])
+        pd.DataFrame(iterable, columns=[Pixels.coords.U, Pixels.coords.V]).astype(
+            np.int32
+        )
     )
 
 
+def test_from_arrays():
+    pixels = Pixels.from_arrays([1, 3, 5], np.array([2, 4, 6], dtype=np.int64))
+    assert pixels.u_array().dtype == np.int32
+    assert pixels.v_array().flags.c_contiguous
+    assert not pixels.v_array().flags.writeable
+    assert pixels == Pixels.from_iterable(iterable)
+    assert pixels != Pixels.from_iterable(iterable[:2])
+    assert not hasattr(pixels, "__dict__")
+
+    fractional = Pixels.from_arrays([1.5, 2.0], [0.25, 3.0])
+    assert fractional.u_array().dtype == np.float64
+
+    with pytest.raises(InvalidInputError):
+        Pixels.from_arrays([1, 2], [3])
+
+
+def test_lazy_df():
+    pixels = Pixels.from_iterable(iterable)
+    assert pixels._data is None
+    assert np.array_equal(pixels.u_array(), [1, 3, 5])
+    assert pixels._data is None
+    assert pixels.df.equals(pixels.df)
+    assert pixels._data is not None
+
+    df = pd.DataFrame(iterable, columns=[Pixels.coords.U, Pixels.coords.V])
+    assert Pixels(df).df.equals(df)
+
+
+def test_df_edits_do_not_desync():
+    pixels = Pixels.from_iterable(iterable)
+    df = pixels.df
+    df[Pixels.coords.U] += 10
+    u = pixels.u()
+    u[0] = 10
+    assert pixels.u().tolist() == [1, 3, 5]
+    assert np.array_equal(pixels.u_array(), [1, 3, 5])
+    assert pixels.box() == PixelsBox(u_min=1, v_min=2, u_max=5, v_max=6)
+
+
+def test_select_chained():
+    pixels = Pixels.from_arrays(np.arange(6), np.arange(6) + 1)
+    selected = pixels.select(np.array([2, 3, 4])).select(slice(1, 3))
+    assert selected.df.index.tolist() == [3, 4]
+    assert np.array_equal(selected.u_array(), [3, 4])
+
+    materialized = pixels.select(np.array([2, 3, 4]))
+    assert materialized.df.index.tolist() == [2, 3, 4]
+    assert materialized.select(slice(1, 3)).df.index.tolist() == [3, 4]
+
+
+def test_box_cached():
+    pixels = Pixels.from_iterable(iterable)
+    assert pixels.box() == PixelsBox(u_min=1, v_min=2, u_max=5, v_max=6)
+    assert pixels.box() is pixels.box()
+    with pytest.raises(InvalidInputError):
+        Pixels.from_iterable([]).box()
+
+
 def test_df():
     df = pd.DataFrame(iterable, columns=["u", "v"])
     pixels = Pixels(df)
@@ -66,3 +129,53 @@ def test_save_and_load_to_parquet():
         loaded_pixels = Pixels.load_from_parquet(parquet_file)
         assert isinstance(loaded_pixels, Pixels)
         assert loaded_pixels.df.equals(pixels.df)
+
+
+def test_pixels_box():
+    box = PixelsBox.from_corners(Pixels.from_iterable([(12, 23), (10, 21)]))
+    assert box == PixelsBox(u_min=10, v_min=21, u_max=12, v_max=23)
+    assert box.width == 3
+    assert box.height == 3
+    assert box.size == 9
+    assert box.slices() == (slice(21, 24), slice(10, 13))
+
+    image = np.arange(30 * 30).reshape(30, 30)
+    assert image[box.slices()].size == box.size
+
+
+def test_pixels_box_to_pixels():
+    box = PixelsBox(u_min=1, v_min=2, u_max=2, v_max=4)
+    expected = Pixels.from_iterable([(u, v) for u in range(1, 3) for v in range(2, 5)])
+    assert box.to_pixels().df.equals(expected.df)
+
+
+def test_span_pixels():
+    pixels = SpanPixels([(4, 2, 3), (1, 5, 5), (1, 0, 1)])
+    assert pixels.spans.tolist() == [[1, 0, 1], [1, 5, 5], [4, 2, 3]]
+    assert len(pixels) == 5
+    assert not pixels.is_expanded()
+    assert pixels.box() == PixelsBox(u_min=0, v_min=1, u_max=5, v_max=4)
+    assert PixelsBox.from_corners(pixels) == pixels.box()
+    assert not pixels.is_expanded()
+
+    expected = Pixels.from_iterable([(0, 1), (1, 1), (5, 1), (2, 4), (3, 4)])
+    assert pixels.df.equals(expected.df)
+    assert pixels.is_expanded()
+
+
+def test_span_pixels_from_box():
+    box = PixelsBox(u_min=1, v_min=2, u_max=3, v_max=3)
+    pixels = SpanPixels.from_box(box)
+    assert pixels.spans.tolist() == [[2, 1, 3], [3, 1, 3]]
+    assert len(pixels) == box.size
+    assert pixels.box() == box
+
+
+def test_span_pixels_invalid():
+    with pytest.raises(InvalidInputError):
+        SpanPixels([(0, 3, 2)])
+    empty = SpanPixels(np.empty((0, 3)))
+    assert len(empty) == 0
+    assert empty.df.empty
+    with pytest.raises(InvalidInputError):
+        empty.box()
@@ -3,6 +3,7 @@ import pytest
 
 from siapy.core.exceptions import InvalidInputError
 from siapy.entities import Pixels, Shape
+from siapy.entities.pixels import PixelsBox
 from siapy.entities.shapes import (
     SHAPE_TYPE_FREEDRAW,
     SHAPE_TYPE_POINT,
@@ -83,6 +84,13 @@ def test_rectangle_convex_hull():
     assert convex_hull_output.df.equals(expected_pixels.df)
 
 
+def test_rectangle_box():
+    pixels = Pixels.from_iterable([(12, 21), (10, 23)])
+    rectangle = Rectangle(pixels=pixels)
+    assert rectangle.box() == PixelsBox(u_min=10, v_min=21, u_max=12, v_max=23)
+    assert len(rectangle.convex_hull()) == rectangle.box().size
+
+
 def test_point_convex_hull():
     pixels_input = [(10, 15), (12, 23)]
     pixels = Pixels.from_iterable(pixels_input)
@@ -103,3 +111,52 @@ def test_freedraw_convex_hull():
     assert convex_hull_output.df.equals(expected_pixels.df)
     # image_mock = np.zeros((10, 10, 3))
     # display_selected_areas(image_mock, convex_hull_output, color="red")
+
+
+def test_freedraw_spans_concave():
+    # U-shaped polygon: the rows of the notch are split into two spans
+    pixels_input = [(0, 0), (6, 0), (6, 4), (4, 4), (4, 2), (2, 2), (2, 4), (0, 4)]
+    freedraw = FreeDraw(pixels=Pixels.from_iterable(pixels_input))
+    spans = freedraw.spans()
+    assert spans.tolist() == [
+        [1, 0, 6],
+        [2, 0, 6],
+        [3, 0, 2],
+        [3, 4, 6],
+        [4, 0, 2],
+        [4, 4, 6],
+    ]
+    convex_hull_output = freedraw.convex_hull()
+    assert len(convex_hull_output) == (spans[:, 2] - spans[:, 1] + 1).sum()
+    assert convex_hull_output.v().is_monotonic_increasing
+
+
+def test_freedraw_spans_cache():
+    pixels = Pixels.from_iterable([(3, 4), (24, 8), (15, 23)])
+    freedraw = FreeDraw(pixels=pixels)
+    assert freedraw.spans() is freedraw.spans()
+    assert not freedraw.spans().flags.writeable
+
+    freedraw_uncached = FreeDraw(pixels=pixels, cache=False)
+    assert freedraw_uncached.spans() is not freedraw_uncached.spans()
+    assert np.array_equal(freedraw_uncached.spans(), freedraw.spans())
+
+
+def test_freedraw_convex_hull_contains_interior():
+    rng = np.random.default_rng(0)
+    points = rng.integers(0, 50, size=(8, 2))
+    freedraw = FreeDraw(pixels=Pixels.from_iterable(points.tolist()))
+    filled = set(map(tuple, freedraw.convex_hull().to_numpy().tolist()))
+
+    # Reference even-odd test for pixels strictly inside the polygon
+    x0, y0 = points[:, 0], points[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    for u in range(50):
+        for v in range(50):
+            crosses = (y0 >= v) != (y1 >= v)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_int = x0 + (v - y0) * (x1 - x0) / (y1 - y0)
+            if np.any(crosses & np.isclose(x_int, u)):
+                continue
+            inside = np.count_nonzero(crosses & (x_int > u)) % 2 == 1
+            assert ((u, v) in filled) == inside
@@ -4,6 +4,7 @@ from tempfile import TemporaryDirectory
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 
 from siapy.core.exceptions import DirectInitializationError, InvalidInputError
@@ -39,6 +40,36 @@ def test_signals_save_and_load_to_parquet():
         assert loaded_signals.df.equals(signals.df)
 
 
+def test_signals_from_array():
+    array = np.arange(12, dtype=np.float64).reshape(4, 3)
+    signals = Signals.from_array(array, columns=[400.0, 500.0, 600.0])
+    assert signals.to_numpy() is array
+    assert np.shares_memory(signals.df.to_numpy(), array)
+    assert signals.df.columns.tolist() == [400.0, 500.0, 600.0]
+    assert signals.shape == (4, 3)
+    assert len(signals) == 4
+    assert signals == Signals(pd.DataFrame(array, columns=[400.0, 500.0, 600.0]))
+
+    signals_half = Signals.from_array(array, dtype=np.float16)
+    assert signals_half.dtype == np.float16
+    assert signals_half.mean().dtype == np.float32
+    assert np.allclose(signals_half.mean(), [4.5, 5.5, 6.5])
+    assert signals_half.astype(np.float32).dtype == np.float32
+
+    with pytest.raises(InvalidInputError):
+        Signals.from_array(array, columns=[400.0])
+
+
+def test_signals_select_chained():
+    array = np.arange(18, dtype=np.float64).reshape(6, 3)
+    signals = Signals.from_array(array)
+    selected = signals.select(np.array([2, 3, 4]), slice(1, None)).select(slice(1, 3))
+    assert selected.df.index.tolist() == [3, 4]
+    assert np.array_equal(selected.to_numpy(), array[3:5, 1:])
+    with pytest.raises(InvalidInputError):
+        Signals.from_array(array.ravel())
+
+
 def test_signatures_filter_create():
     pixels_df = pd.DataFrame({"u": [0, 1], "v": [0, 1]})
     signals_df = pd.DataFrame([[1, 2], [3, 4]])
@@ -107,6 +138,50 @@ def test_signatures_filter_with_list_bool():
     assert cols_filter.signals.df.equals(signals_df.iloc[:, [True, False]])
 
 
+def test_signatures_filter_chained_views():
+    signals_arr = np.arange(40, dtype=np.float32).reshape(10, 4)
+    pixels = Pixels.from_arrays(np.arange(10), np.arange(10) * 2)
+    signatures = Signatures.from_signals_and_pixels(signals_arr, pixels)
+
+    signatures_filter = signatures.filter().rows(slice(2, None)).rows(slice(1, 6, 2))
+    filtered = signatures_filter.cols(slice(1, 3)).build()
+    assert np.shares_memory(filtered.signals.to_numpy(), signals_arr)
+    assert np.array_equal(filtered.signals.to_numpy(), signals_arr[[3, 5, 7], 1:3])
+    assert np.array_equal(filtered.pixels.u_array(), [3, 5, 7])
+    assert filtered.signals.df.index.tolist() == [3, 5, 7]
+    assert filtered.pixels.df.index.tolist() == [3, 5, 7]
+    assert filtered.to_dataframe().notna().all().all()
+
+    reversed_rows = signatures.filter().rows(slice(None, None, -1)).build()
+    assert np.array_equal(reversed_rows.pixels.u_array(), np.arange(10)[::-1])
+
+    mixed = (
+        signatures.filter()
+        .rows([True, False] * 5)
+        .rows([4, 0])
+        .cols([False, True, False, True])
+        .build()
+    )
+    assert np.array_equal(mixed.signals.to_numpy(), signals_arr[[8, 0]][:, [1, 3]])
+    assert mixed.signals.df.index.tolist() == [8, 0]
+    assert mixed.signals.columns.tolist() == [1, 3]
+
+    with pytest.raises(InvalidInputError):
+        signatures.filter().rows([True, False])
+
+
+def test_signatures_filter_is_lazy():
+    pixels_df = pd.DataFrame({"u": [0, 1, 2], "v": [0, 1, 2]})
+    signals = Signals(pd.DataFrame([[1, 2], [3, 4], [5, 6]]))
+    signatures_filter = Signatures._create(Pixels(pixels_df), signals).filter()
+    chained = signatures_filter.rows([0, 2]).cols([1])
+    assert chained._selected is None
+    assert chained.build().signals.df.equals(
+        pd.DataFrame([[2], [6]], index=[0, 2], columns=[1])
+    )
+    assert chained._selected is not None
+
+
 def test_signatures_create():
     pixels_df = pd.DataFrame({"u": [0, 1], "v": [0, 1]})
     signals_df = pd.DataFrame([[1, 2], [3, 4]])
@@ -139,6 +214,18 @@ def test_signatures_from_array_and_pixels():
     )
 
 
+def test_signatures_from_signals_and_pixels():
+    pixels = Pixels(pd.DataFrame({"u": [0, 1], "v": [0, 1]}))
+    signals_arr = np.array([[1, 2], [7, 8]])
+    signatures = Signatures.from_signals_and_pixels(signals_arr, pixels)
+
+    assert signatures.pixels == pixels
+    assert signatures.signals.df.equals(pd.DataFrame(signals_arr))
+
+    with pytest.raises(InvalidInputError):
+        Signatures.from_signals_and_pixels(signals_arr[:1], pixels)
+
+
 def test_signatures_from_dataframe():
     df = pd.DataFrame({"u": [0, 1], "v": [0, 1], "0": [1, 2], "1": [3, 4]})
     signatures = Signatures.from_dataframe(df)
@@ -169,3 +256,110 @@ def test_signatures_save_and_load_to_parquet():
         loaded_signatures = Signatures.load_from_parquet(parquet_file)
         assert isinstance(loaded_signatures, Signatures)
         assert loaded_signatures.to_dataframe().equals(signatures.to_dataframe())
+
+
+def test_signatures_parquet_row_groups():
+    signals_arr = np.arange(50, dtype=np.float32).reshape(25, 2)
+    pixels = Pixels.from_arrays(np.arange(25), np.zeros(25, dtype=int))
+    signatures = Signatures.from_signals_and_pixels(signals_arr, pixels)
+    with TemporaryDirectory() as tmpdir:
+        parquet_file = Path(tmpdir, "signatures.parquet")
+        signatures.save_to_parquet(parquet_file, row_group_size=10)
+        assert pq.ParquetFile(parquet_file).num_row_groups == 3
+
+        loaded = Signatures.load_from_parquet(
+            parquet_file, columns=[1], filters=[("u", ">=", 20)]
+        )
+        assert np.array_equal(loaded.pixels.u_array(), np.arange(20, 25))
+        # mixed u/v and band labels are stored as strings, as with pandas
+        assert loaded.signals.columns.tolist() == ["1"]
+        assert np.array_equal(loaded.signals.to_numpy(), signals_arr[20:, [1]])
+
+
+def test_signatures_parquet_partitioned():
+    rng = np.random.default_rng(0)
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "archive")
+        expected = {}
+        for label, size in [("leaf", 4), ("stem", 3), ("leaf", 2)]:
+            pixels = Pixels.from_arrays(rng.integers(0, 9, size), np.arange(size))
+            signatures = Signatures.from_signals_and_pixels(
+                rng.random((size, 3)), pixels, columns=[400.0, 500.0, 600.0]
+            )
+            signatures.save_to_parquet(
+                root, partition={"shape_label": label}, append=True
+            )
+            expected.setdefault(label, []).append(signatures)
+
+        assert sorted(os.listdir(root)) == ["shape_label=leaf", "shape_label=stem"]
+        loaded = Signatures.load_from_parquet(root)
+        assert len(loaded.pixels) == 9
+        assert loaded.signals.columns.tolist() == ["400.0", "500.0", "600.0"]
+
+        stem = Signatures.load_from_parquet(
+            root, columns=[500.0], filters=[("shape_label", "=", "stem")]
+        )
+        stem_expected = expected["stem"][0]
+        assert stem.signals.columns.tolist() == ["500.0"]
+        assert np.array_equal(
+            stem.signals.to_numpy(), stem_expected.signals.to_numpy()[:, [1]]
+        )
+        assert np.array_equal(stem.pixels.u_array(), stem_expected.pixels.u_array())
+
+        expected["leaf"][0].save_to_parquet(root, partition={"shape_label": "leaf"})
+        assert len(Signatures.load_from_parquet(root).pixels) == 7
+
+        with pytest.raises(InvalidInputError):
+            stem_expected.save_to_parquet(root, partition={"u": 1})
+
+
+def test_signatures_iter_batches():
+    signals_arr = np.arange(30, dtype=np.float32).reshape(10, 3)
+    pixels = Pixels.from_arrays(np.arange(10), np.arange(10) + 1)
+    signatures = Signatures.from_signals_and_pixels(signals_arr, pixels)
+
+    batches = list(signatures.iter_batches(4))
+    assert [len(batch.signals) for batch in batches] == [4, 4, 2]
+    assert np.shares_memory(batches[0].signals, signals_arr)
+    assert np.array_equal(batches[2].pixels, [[8, 9], [9, 10]])
+    assert np.array_equal(np.concatenate([b.signals for b in batches]), signals_arr)
+
+    with pytest.raises(InvalidInputError):
+        next(signatures.iter_batches(0))
+
+
+def test_signatures_iter_parquet_batches():
+    rng = np.random.default_rng(0)
+    with TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir, "archive")
+        parts = []
+        for label, size in [("leaf", 7), ("stem", 5), ("leaf", 6)]:
+            pixels = Pixels.from_arrays(np.arange(size), np.full(size, len(parts)))
+            signatures = Signatures.from_signals_and_pixels(
+                rng.random((size, 3)), pixels
+            )
+            signatures.save_to_parquet(
+                root, row_group_size=4, partition={"shape_label": label}, append=True
+            )
+            parts.append((label, signatures))
+
+        batches = list(Signatures.iter_parquet_batches(root, 5))
+        assert [len(batch.pixels) for batch in batches] == [5, 5, 5, 3]
+        assert all(batch.signals.shape[1] == 3 for batch in batches)
+
+        leaf_batches = list(
+            Signatures.iter_parquet_batches(
+                root,
+                4,
+                columns=[2],
+                filters=[("shape_label", "=", "leaf")],
+                dtype=np.float32,
+            )
+        )
+        leaf_signals = np.concatenate([batch.signals for batch in leaf_batches])
+        assert [len(batch.signals) for batch in leaf_batches] == [4, 4, 4, 1]
+        assert leaf_signals.dtype == np.float32
+        expected = np.concatenate(
+            [s.signals.to_numpy()[:, [2]] for label, s in parts if label == "leaf"]
+        )
+        assert np.allclose(np.sort(leaf_signals, axis=0), np.sort(expected, axis=0))
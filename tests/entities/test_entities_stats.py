@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from siapy.core.exceptions import InvalidInputError
+from siapy.entities.stats import ImageStats, StreamingStats
+
+
+def _image_with_nans() -> np.ndarray:
+    image = np.random.default_rng(0).random((20, 6, 4))
+    image[3, 4, :] = np.nan
+    image[5, :, 2] = np.nan
+    return image
+
+
+def test_streaming_stats_matches_numpy():
+    image = _image_with_nans()
+    streaming_stats = StreamingStats(4)
+    for row_start in range(0, 20, 3):
+        streaming_stats.update(image[row_start : row_start + 3])
+    stats = streaming_stats.result()
+
+    assert isinstance(stats, ImageStats)
+    assert np.array_equal(stats.count, np.count_nonzero(~np.isnan(image), (0, 1)))
+    assert np.allclose(stats.mean, np.nanmean(image, axis=(0, 1)))
+    assert np.allclose(stats.std, np.nanstd(image, axis=(0, 1)))
+    assert np.allclose(stats.min, np.nanmin(image, axis=(0, 1)))
+    assert np.allclose(stats.max, np.nanmax(image, axis=(0, 1)))
+    assert stats.percentiles == {}
+    assert stats.histogram is None
+
+
+def test_streaming_stats_percentiles_exact_below_sample_size():
+    image = _image_with_nans()
+    streaming_stats = StreamingStats(4, percentiles=[10, 50], sample_size=1000)
+    for block in np.array_split(image, 4):
+        streaming_stats.update(block)
+    stats = streaming_stats.result()
+    expected = np.nanpercentile(image.reshape(-1, 4), [10, 50], axis=0)
+    assert np.allclose(stats.percentiles[10], expected[0])
+    assert np.allclose(stats.percentiles[50], expected[1])
+
+
+def test_streaming_stats_percentiles_sampled():
+    values = np.random.default_rng(0).random((20000, 2))
+    streaming_stats = StreamingStats(2, percentiles=[50], sample_size=2000)
+    for block in np.array_split(values, 10):
+        streaming_stats.update(block)
+    stats = streaming_stats.result()
+    assert np.allclose(stats.percentiles[50], 0.5, atol=0.05)
+
+
+def test_streaming_stats_histogram():
+    image = _image_with_nans()
+    streaming_stats = StreamingStats(4, bins=5, bins_range=(0.0, 1.0))
+    for block in np.array_split(image, 3):
+        streaming_stats.update(block)
+    stats = streaming_stats.result()
+    for band in range(4):
+        band_values = image[..., band]
+        expected, edges = np.histogram(
+            band_values[~np.isnan(band_values)], bins=5, range=(0.0, 1.0)
+        )
+        assert np.array_equal(stats.histogram[band], expected)
+        assert np.allclose(stats.bin_edges, edges)
+
+
+def test_streaming_stats_all_nan_band():
+    block = np.random.default_rng(0).random((5, 2))
+    block[:, 1] = np.nan
+    streaming_stats = StreamingStats(2)
+    streaming_stats.update(block)
+    stats = streaming_stats.result()
+    assert stats.count[1] == 0
+    assert np.isnan(stats.mean[1])
+    assert np.isnan(stats.min[1])
+
+
+def test_streaming_stats_invalid_bins():
+    with pytest.raises(InvalidInputError):
+        StreamingStats(2, bins=5)
+    with pytest.raises(InvalidInputError):
+        StreamingStats(2, bins=5, bins_range=(1.0, 0.0))
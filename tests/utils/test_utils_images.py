@@ -251,3 +251,16 @@ def test_blockfy_image():
     np.testing.assert_array_almost_equal(
         reconstructed_image[: image.shape[0], : image.shape[1]], image
     )
+
+
+def test_calculate_correction_factor_from_panel_without_label_streaming():
+    image = np.random.default_rng(0).random((8, 6, 3)).astype(np.float32) + 0.5
+    with TemporaryDirectory() as tmpdir:
+        save_path = Path(tmpdir, "panel.hdr")
+        save_image(image, save_path)
+        spectral_image = SpectralImage.envi_open(header_path=save_path)
+        panel_correction = calculate_correction_factor_from_panel(
+            image=spectral_image, panel_reference_reflectance=0.2
+        )
+    assert panel_correction.shape == (3,)
+    assert np.allclose(panel_correction * image.mean(axis=(0, 1)), 0.2)